@@ -0,0 +1,165 @@
+# analytics.py
+"""API phân tích của dashboard, dùng được không cần Streamlit.
+
+Gồm các bước mà end-user.py thực hiện cho mỗi lần chạy: nạp Dataset, lọc theo
+nguồn / địa điểm / vai trò / kinh nghiệm (Selection), tính KPI và dựng biểu đồ /
+bảng của từng tab. end-user.py hiển thị các kết quả này; report.py dựng chúng cho
+hàng loạt phân khúc và ghi ra file.
+
+Giá trị lọc None nghĩa là "Tất cả". Mỗi hàm dựng trả về Figure / DataFrame, hoặc
+None nếu dữ liệu không có cột tương ứng hoặc không có gì để vẽ.
+"""
+import threading
+
+import dataset as ds
+import charts
+import salary
+
+DATA_CSV_FILENAME = "data_cleaned.csv"
+DATA_STORE_DIR = "store"
+FILTER_COLUMNS = {'source': 'source_website', 'location': 'location_primary', 'role': 'job_role_group'}
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+def open_source(csv_file_name, store_dir):
+    """Nguồn dữ liệu dùng chung trong tiến trình: kho phân vùng nếu đã khởi tạo, ngược lại
+    snapshot của file CSV. Giữ lại giữa các lần gọi để batch mới được nạp tăng dần; khi đang
+    đọc CSV mà kho vừa được khởi tạo (ingest.py chạy sau khi app đã mở) thì chuyển sang kho."""
+    key = (csv_file_name, store_dir)
+    with _sources_lock:
+        source = _sources.get(key)
+        if source is None or (isinstance(source, ds.CsvSnapshotSource) and ds.store_ready(store_dir)):
+            source = _sources[key] = ds.open_source(csv_file_name, store_dir)
+        return source
+
+
+def load_dataset(csv_file_name=DATA_CSV_FILENAME, store_dir=DATA_STORE_DIR):
+    """Dataset mới nhất của nguồn dữ liệu (tự nạp batch mới / snapshot mới)."""
+    return open_source(csv_file_name, store_dir).current()
+
+
+class Selection:
+    """Các dòng (vị trí) và ô cube khớp một bộ lọc trên một Dataset."""
+
+    def __init__(self, dataset, source=None, location=None, role=None, exp_range=None):
+        self.dataset = dataset
+        self.source, self.location, self.role = source, location, role
+        self.exp_range = tuple(exp_range) if exp_range is not None else None
+        self.rows = dataset.filter_index.select(source=source, location=location, role=role, exp_range=self.exp_range)
+        self.cells = dataset.cube.select_cells(source=source, location=location, role=role, exp_range=self.exp_range)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def filters(self):
+        return {'source': self.source, 'location': self.location, 'role': self.role,
+                'exp_range': list(self.exp_range) if self.exp_range is not None else None}
+
+
+# --- KPI tổng quan ---
+def kpis(selection):
+    """Tổng số tin, trung vị kinh nghiệm tối thiểu (năm) và thời điểm cập nhật mới nhất."""
+    cube = selection.dataset.cube
+    median_experience = cube.median_experience(selection.cells) if 'experience_years_min_numeric' in cube.dimensions else None
+    return {'total_jobs': cube.total(selection.cells), 'median_experience': median_experience,
+            'latest_update': cube.latest_update(selection.cells)}
+
+
+# --- Tab 1: Địa điểm & Vai trò ---
+def location_bar(selection):
+    cube = selection.dataset.cube
+    if 'location_primary' not in cube.dimensions:
+        return None
+    return charts.location_bar(cube.rollup('location_primary', selection.cells).head(7))
+
+
+def role_pie(selection):
+    cube = selection.dataset.cube
+    if 'job_role_group' not in cube.dimensions:
+        return None
+    return charts.role_pie(cube.rollup('job_role_group', selection.cells))
+
+
+# --- Tab 2: Kinh nghiệm & Kỹ năng ---
+def experience_bar(selection):
+    cube = selection.dataset.cube
+    if 'experience_years_min_numeric' not in cube.dimensions:
+        return None
+    return charts.experience_bar(cube.experience_group_counts(selection.cells))
+
+
+def skills_bar(selection):
+    skill_matrix = selection.dataset.skill_matrix
+    return charts.skills_bar(skill_matrix.top_skills(selection.rows, 10)) if skill_matrix is not None else None
+
+
+def cooccurrence_heatmap(selection):
+    skill_matrix = selection.dataset.skill_matrix
+    return charts.cooccurrence_heatmap(skill_matrix.cooccurrence(selection.rows, 10)) if skill_matrix is not None else None
+
+
+def associated_skills_bar(dataset, column, value):
+    """Kỹ năng đặc trưng của một vai trò / địa điểm, tính trên toàn bộ dữ liệu (không theo bộ lọc)."""
+    if dataset.skill_matrix is None or column not in dataset.columns:
+        return None
+    return charts.associated_skills_bar(dataset.skill_matrix.associated_skills(column, dataset.column(column), value, 10), value)
+
+
+# --- Tab 3: Lương & Phúc lợi ---
+def salary_overview(selection):
+    """(tóm tắt lương, histogram lương tối thiểu); (None, None) nếu dữ liệu không có cột lương."""
+    columns = selection.dataset.columns
+    if 'salary_min_vnd' not in columns or 'salary_negotiable' not in columns:
+        return None, None
+    return charts.salary_overview(selection.dataset.rows(selection.rows, salary.INPUT_COLUMNS))
+
+
+def salary_percentiles(selection):
+    """Phân vị lương tối thiểu theo vai trò (số VND), hoặc None nếu cube không có vai trò."""
+    cube = selection.dataset.cube
+    if 'job_role_group' not in cube.dimensions:
+        return None
+    return salary.role_percentiles(cube, selection.cells)
+
+
+def salary_percentile_table(selection):
+    percentiles = salary_percentiles(selection)
+    return charts.salary_percentile_table(percentiles) if percentiles is not None else None
+
+
+def benefits_bar(selection):
+    dataset = selection.dataset
+    if 'parsed_benefits' not in dataset.columns:
+        return None
+    return charts.benefits_bar(charts.top_benefits(dataset.rows(selection.rows, ['parsed_benefits'])['parsed_benefits'], 10))
+
+
+# --- Tab 4: Xu hướng thời gian ---
+def monthly_trend_line(selection):
+    cube = selection.dataset.cube
+    if 'posted_year_month' not in cube.dimensions:
+        return None
+    return charts.monthly_trend_line(cube.monthly_counts(selection.cells))
+
+
+# --- Báo cáo đầy đủ của một phân khúc ---
+def segment_report(selection):
+    """KPI, tóm tắt lương, bảng phân vị lương và mọi biểu đồ của một phân khúc (theo thứ tự các tab)."""
+    summary, salary_histogram = salary_overview(selection)
+    figures = {
+        'location_bar': location_bar(selection),
+        'role_pie': role_pie(selection),
+        'experience_bar': experience_bar(selection),
+        'skills_bar': skills_bar(selection),
+        'cooccurrence_heatmap': cooccurrence_heatmap(selection),
+        'associated_skills_bar': associated_skills_bar(selection.dataset, 'job_role_group', selection.role) if selection.role is not None else None,
+        'salary_histogram': salary_histogram,
+        'benefits_bar': benefits_bar(selection),
+        'monthly_trend_line': monthly_trend_line(selection),
+    }
+    return {'filters': selection.filters, 'postings': len(selection), 'kpis': kpis(selection),
+            'salary_summary': summary, 'salary_percentiles': salary_percentiles(selection),
+            'figures': {chart_id: fig for chart_id, fig in figures.items() if fig is not None}}
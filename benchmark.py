@@ -0,0 +1,328 @@
+# benchmark.py
+"""Đo hiệu năng các bước của dashboard không cần trình duyệt, trên dữ liệu giả lập.
+
+Với mỗi quy mô (mặc định 10k, 100k; có thể chạy 1M, 10M), script sinh file CSV giả lập
+(synthetic_data.py, được giữ lại trong --workdir để dùng cho các lần chạy sau), rồi chạy
+các bước của end-user.py trong một tiến trình con riêng, qua đúng các hàm mà app gọi
+(dataset.CsvSnapshotSource / PartitionedStoreSource, analytics.Selection, analytics.*):
+    csv_read, json_parse, snapshot_build                 - nạp CSV / parse JSON / build snapshot
+    dataset_load                                         - CsvSnapshotSource.current(); các span bên trong
+                                                           thành bước riêng: snapshot_check, snapshot_load,
+                                                           role_classification, prepare_frame,
+                                                           filter_index_build, skill_matrix_build, cube_build
+    sidebar_filter                                       - Selection + KPI cho một loạt tổ hợp bộ lọc
+    dataset_rows                                         - Dataset.rows của bảng "toàn bộ dữ liệu (sau lọc)"
+    tab_location_role, tab_experience_skills,
+    tab_salary_benefits, tab_trend                       - dựng + tuần tự hóa biểu đồ từng tab (analytics.*)
+    store_ingest, store_load                             - nạp cả CSV vào kho phân vùng rồi đọc lên
+    incremental_ingest, incremental_reload               - nạp một batch INCREMENTAL_BATCH_ROWS dòng vào
+                                                           lịch sử cỡ quy mô đang đo, rồi nạp lại Dataset
+                                                           (span bên trong: incremental_reload.<span>)
+Mỗi bước ghi thời gian (giây, lấy lần nhanh nhất trong --repeat lần), số dòng vào/ra và
+đỉnh bộ nhớ RSS của tiến trình tính đến hết bước đó. Kết quả ghi ra JSON.
+
+Nếu có --baseline (file JSON của một lần chạy trước), các bước chậm hơn ngưỡng trong
+--thresholds được liệt kê trong "regressions" và script thoát với mã 1. File ngưỡng:
+    {"max_ratio": 1.25, "min_delta_seconds": 0.05, "max_peak_rss_ratio": 1.2,
+     "stages": {"sidebar_filter": {"max_ratio": 1.5}}}
+
+Chạy tay: python benchmark.py --sizes 10k 100k --output bench_results.json [--baseline bench_baseline.json]
+"""
+import os
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import synthetic_data
+import instrumentation
+
+DEFAULT_SIZES = ['10k', '100k']
+DEFAULT_WORKDIR = ".bench"
+DEFAULT_THRESHOLDS_FILE = "benchmark_thresholds.json"
+DEFAULT_THRESHOLDS = {'max_ratio': 1.25, 'min_delta_seconds': 0.05, 'max_peak_rss_ratio': 1.2, 'stages': {}}
+INCREMENTAL_BATCH_ROWS = 50
+_SPAN_TRACE_CONFIG = instrumentation.TraceConfig(log_path=None)
+
+
+def _peak_rss_mb():
+    # ru_maxrss tính bằng KB trên Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rows(result):
+    return len(result) if isinstance(result, (pd.DataFrame, pd.Series, np.ndarray)) else None
+
+
+class StageTimer:
+    """Chạy và ghi lại thời gian / số dòng / đỉnh RSS của từng bước."""
+
+    def __init__(self, repeat=1):
+        self.repeat = max(1, repeat)
+        self.stages = {}
+
+    def run(self, name, fn, rows_in=None, repeat=None, setup=None, span_prefix=None):
+        """Chạy fn (repeat lần, mặc định self.repeat); setup() chạy trước mỗi lần và không tính giờ.
+
+        span_prefix: ghi các span instrumentation bên trong fn thành bước riêng tên span_prefix + tên span.
+        """
+        runs, span_runs, result = [], [], None
+        for _ in range(self.repeat if repeat is None else repeat):
+            if setup is not None:
+                setup()
+            result = None
+            gc.collect()
+            if span_prefix is not None:
+                instrumentation.begin_trace(_SPAN_TRACE_CONFIG, force=True)
+            start = time.perf_counter()
+            try:
+                result = fn()
+            finally:
+                runs.append(time.perf_counter() - start)
+                if span_prefix is not None:
+                    span_runs.append(instrumentation.end_trace(_SPAN_TRACE_CONFIG).spans)
+        self.stages[name] = {'seconds': min(runs), 'runs': runs, 'rows_in': rows_in,
+                             'rows_out': _rows(result), 'peak_rss_mb': round(_peak_rss_mb(), 1)}
+        if span_prefix is not None:
+            self._record_spans(name, span_prefix, span_runs)
+        return result
+
+    def _record_spans(self, parent, prefix, span_runs):
+        # Span cùng tên trong một lần chạy được cộng dồn; giữa các lần chạy lấy lần nhanh nhất
+        totals = {}
+        for run_index, spans in enumerate(span_runs):
+            for span in spans:
+                stage = totals.setdefault(prefix + span.name, {'runs': [0.0] * len(span_runs), 'rows_in': span.rows_in,
+                                                               'rows_out': span.rows_out, 'parent': parent})
+                stage['runs'][run_index] += span.seconds
+        for stage_name, stage in totals.items():
+            self.stages[stage_name] = {'seconds': min(stage['runs']), **stage}
+
+    def note(self, name, **values):
+        self.stages[name].update(values)
+
+
+# --- Các bước của dashboard ---
+def _serialize(outputs):
+    """Tuần tự hóa Figure/DataFrame như khi gửi xuống trình duyệt; trả về tổng số byte."""
+    total = 0
+    for output in outputs:
+        if output is None:
+            continue
+        total += len(output.to_json())
+    return total
+
+
+def _incremental_batches(csv_path, batch_dir, count):
+    """count file batch nhỏ lấy từ đầu CSV: nửa tin được cào lại (process_timestamp mới hơn, thay
+    thế tin cũ), nửa tin mới (url mới) - giống một lần chạy scraper định kỳ."""
+    seed = pd.read_csv(csv_path, nrows=INCREMENTAL_BATCH_ROWS * count)
+    for i in range(count):
+        batch = seed.iloc[(i * INCREMENTAL_BATCH_ROWS) % len(seed):][:INCREMENTAL_BATCH_ROWS].copy()
+        batch['process_timestamp'] = (pd.Timestamp('2100-01-01') + pd.Timedelta(minutes=i)).isoformat()
+        is_new = np.arange(len(batch)) % 2 == 1
+        batch.loc[is_new, 'url'] = batch.loc[is_new, 'url'].astype(str) + f"#incremental-{i}"
+        path = os.path.join(batch_dir, f"batch_{i}.csv")
+        batch.to_csv(path, index=False)
+        yield path
+
+
+def _sidebar_combinations(filter_options, exp_bounds):
+    sources = [None] + filter_options['source_website']
+    roles = [None] + filter_options['job_role_group'][:3]
+    locations = [None] + filter_options['location_primary'][:2]
+    exp_ranges = [exp_bounds]
+    if exp_bounds is not None and exp_bounds[1] - exp_bounds[0] >= 2:
+        exp_ranges.append((exp_bounds[0] + 1, exp_bounds[0] + 2))
+    return [(s, l, r, e) for s in sources for l in locations for r in roles for e in exp_ranges]
+
+
+def run_stages(csv_path, repeat=1):
+    """Chạy tuần tự các bước trên một file CSV qua đúng các hàm dashboard gọi; trả về dict các bước."""
+    import snapshot
+    import ingest
+    import analytics
+    import dataset as ds
+
+    timer = StageTimer(repeat)
+    df_raw = timer.run('csv_read', lambda: pd.read_csv(csv_path))
+    n_rows = len(df_raw)
+    timer.run('json_parse', lambda: snapshot.build_frame(df_raw), rows_in=n_rows)
+    del df_raw
+    manifest = timer.run('snapshot_build', lambda: snapshot.build_snapshot(csv_path))
+    timer.note('snapshot_build', rows_out=manifest['rows'])
+    dataset = timer.run('dataset_load', lambda: ds.CsvSnapshotSource(csv_path).current(), rows_in=n_rows, span_prefix='')
+    timer.note('dataset_load', rows_out=len(dataset))
+    timer.note('cube_build', cells=len(dataset.cube.count))
+
+    filter_options = {col: dataset.filter_options(col) for col in ('source_website', 'location_primary', 'job_role_group')}
+    exp_bounds = dataset.experience_bounds()
+    combinations = _sidebar_combinations(filter_options, exp_bounds)
+
+    def sidebar_filter():
+        # Mỗi lần lặp dùng chỉ mục với cache trống để đo đúng chi phí tính bộ lọc
+        dataset.filter_index._cache.clear()
+        for source, location, role, exp_range in combinations:
+            analytics.kpis(analytics.Selection(dataset, source, location, role, exp_range))
+    timer.run('sidebar_filter', sidebar_filter, rows_in=n_rows)
+    timer.note('sidebar_filter', selections=len(combinations),
+               seconds_per_selection=timer.stages['sidebar_filter']['seconds'] / len(combinations))
+
+    # Các tab được đo với lựa chọn mặc định khi mở trang (không lọc, toàn bộ khoảng kinh nghiệm)
+    selection = analytics.Selection(dataset, exp_range=exp_bounds)
+    timer.run('dataset_rows', lambda: dataset.rows(selection.rows), rows_in=len(selection))
+    assoc_role = filter_options['job_role_group'][0] if filter_options['job_role_group'] else None
+
+    def tab_location_role():
+        return [analytics.location_bar(selection), analytics.role_pie(selection)]
+
+    def tab_experience_skills():
+        return [analytics.experience_bar(selection), analytics.skills_bar(selection),
+                analytics.cooccurrence_heatmap(selection),
+                analytics.associated_skills_bar(dataset, 'job_role_group', assoc_role)]
+
+    def tab_salary_benefits():
+        return [analytics.salary_overview(selection)[1], analytics.salary_percentile_table(selection),
+                analytics.benefits_bar(selection)]
+
+    def tab_trend():
+        return [analytics.monthly_trend_line(selection)]
+
+    for name, build in [('tab_location_role', tab_location_role), ('tab_experience_skills', tab_experience_skills),
+                        ('tab_salary_benefits', tab_salary_benefits), ('tab_trend', tab_trend)]:
+        payload_bytes = timer.run(name, lambda: _serialize(build()), rows_in=len(selection))
+        timer.note(name, payload_bytes=payload_bytes)
+    del dataset, selection
+
+    # Nạp tăng dần: batch nhỏ nối vào lịch sử n_rows dòng trong kho phân vùng
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_dir = os.path.join(tmp_dir, "store")
+        timer.run('store_ingest', lambda: ingest.ingest_batch(store_dir, csv_path), rows_in=n_rows, repeat=1)
+        source = ds.PartitionedStoreSource(store_dir)
+        store_dataset = timer.run('store_load', source.current, rows_in=n_rows, repeat=1)
+        timer.note('store_load', rows_out=len(store_dataset))
+        del store_dataset
+        batches = _incremental_batches(csv_path, tmp_dir, 2 * timer.repeat)
+        timer.run('incremental_ingest', lambda: ingest.ingest_batch(store_dir, next(batches)), rows_in=INCREMENTAL_BATCH_ROWS)
+        source.current()
+        reloaded = timer.run('incremental_reload', source.current, rows_in=INCREMENTAL_BATCH_ROWS,
+                             setup=lambda: ingest.ingest_batch(store_dir, next(batches)), span_prefix='incremental_reload.')
+        timer.note('incremental_reload', history_rows=len(reloaded))
+    return {'rows': n_rows, 'stages': timer.stages, 'peak_rss_mb': round(_peak_rss_mb(), 1)}
+
+
+# --- So sánh với baseline ---
+def load_thresholds(path):
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            thresholds.update(json.load(f))
+    return thresholds
+
+
+def find_regressions(results, baseline, thresholds):
+    """Các bước (theo quy mô) chậm hơn / tốn bộ nhớ hơn baseline quá ngưỡng."""
+    regressions = []
+    for size, current in results.items():
+        base = baseline.get('sizes', {}).get(size)
+        if base is None:
+            continue
+        for stage, values in current['stages'].items():
+            base_values = base['stages'].get(stage)
+            if base_values is None:
+                continue
+            limits = {**thresholds, **thresholds.get('stages', {}).get(stage, {})}
+            delta = values['seconds'] - base_values['seconds']
+            ratio = values['seconds'] / base_values['seconds'] if base_values['seconds'] > 0 else float('inf')
+            if ratio > limits['max_ratio'] and delta > limits['min_delta_seconds']:
+                regressions.append({'size': size, 'stage': stage, 'metric': 'seconds', 'baseline': base_values['seconds'],
+                                    'current': values['seconds'], 'ratio': round(ratio, 3), 'limit': limits['max_ratio']})
+        if base.get('peak_rss_mb') and current['peak_rss_mb'] / base['peak_rss_mb'] > thresholds['max_peak_rss_ratio']:
+            regressions.append({'size': size, 'stage': None, 'metric': 'peak_rss_mb', 'baseline': base['peak_rss_mb'],
+                                'current': current['peak_rss_mb'], 'ratio': round(current['peak_rss_mb'] / base['peak_rss_mb'], 3),
+                                'limit': thresholds['max_peak_rss_ratio']})
+    return regressions
+
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    import pyarrow, plotly
+    return {'timestamp': datetime.now(timezone.utc).isoformat(), 'git_commit': commit, 'platform': platform.platform(),
+            'python': platform.python_version(), 'cpu_count': os.cpu_count(), 'pandas': pd.__version__,
+            'numpy': np.__version__, 'pyarrow': pyarrow.__version__, 'plotly': plotly.__version__}
+
+
+# --- Chạy ---
+def synthetic_csv(workdir, size, random_seed=0):
+    """File CSV giả lập cho một quy mô (sinh một lần, dùng lại cho các lần chạy sau)."""
+    os.makedirs(workdir, exist_ok=True)
+    path = os.path.join(workdir, f"synthetic_{size}_seed{random_seed}.csv")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        seed_csv = os.path.join(os.path.dirname(os.path.abspath(__file__)), synthetic_data.SEED_CSV)
+        synthetic_data.write_synthetic_csv(tmp_path, synthetic_data.parse_size(size), seed_csv, random_seed)
+        os.replace(tmp_path, path)
+    return path
+
+
+def run_size(csv_path, repeat):
+    """Chạy các bước trong tiến trình con để đỉnh RSS tính riêng cho từng quy mô."""
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-stages', csv_path, '--repeat', str(repeat)],
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Đo hiệu năng các bước của dashboard trên dữ liệu giả lập.")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="Các quy mô, ví dụ 10k 100k 1M 10M")
+    parser.add_argument('--output', default="bench_results.json", help="File JSON kết quả")
+    parser.add_argument('--baseline', help="File JSON kết quả của lần chạy trước để so sánh")
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS_FILE, help="File JSON ngưỡng hồi quy")
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR, help="Thư mục chứa dữ liệu giả lập")
+    parser.add_argument('--repeat', type=int, default=1, help="Số lần lặp mỗi bước (lấy lần nhanh nhất)")
+    parser.add_argument('--random-seed', type=int, default=0)
+    parser.add_argument('--run-stages', metavar='CSV', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_stages:
+        json.dump(run_stages(args.run_stages, args.repeat), sys.stdout)
+        return 0
+
+    results = {}
+    for size in args.sizes:
+        csv_path = synthetic_csv(args.workdir, size, args.random_seed)
+        results[size] = run_size(csv_path, args.repeat)
+        results[size]['csv_bytes'] = os.path.getsize(csv_path)
+        slowest = sorted(results[size]['stages'].items(), key=lambda kv: -kv[1]['seconds'])[:3]
+        print(f"{size}: đỉnh RSS {results[size]['peak_rss_mb']:.0f} MB; chậm nhất: "
+              + ", ".join(f"{name} {values['seconds']:.2f}s" for name, values in slowest))
+
+    thresholds = load_thresholds(args.thresholds)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), thresholds)
+    report = {'meta': _environment(), 'baseline': args.baseline, 'thresholds': thresholds,
+              'sizes': results, 'regressions': regressions}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for r in regressions:
+        print(f"HỒI QUY {r['size']} {r['stage'] or ''} {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} (x{r['ratio']}, ngưỡng x{r['limit']})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# charts.py
+"""Dựng các biểu đồ Plotly của dashboard từ dữ liệu đã tổng hợp.
+
+Các hàm ở đây không gọi Streamlit, nên dùng được cả trong end-user.py lẫn khi
+chạy không giao diện (benchmark.py). Mỗi hàm nhận kết quả tổng hợp (Series /
+DataFrame nhỏ) và trả về Figure, hoặc None nếu không có dữ liệu để vẽ.
+"""
+import pandas as pd
+import plotly.express as px
+
+import instrumentation
+import salary
+
+FONT = dict(family="Arial, sans-serif")
+
+
+# --- Tab 1: Địa điểm & Vai trò ---
+@instrumentation.traced
+def location_bar(location_counts):
+    if location_counts.empty:
+        return None
+    fig = px.bar(location_counts, x=location_counts.index, y=location_counts.values, labels={'x':'Địa điểm', 'y':'Số lượng tin'}, title="<b>Top 7 Địa điểm Tuyển dụng</b>", color=location_counts.index, color_discrete_sequence=px.colors.qualitative.Pastel1)
+    fig.update_layout(xaxis_tickangle=-45, title_x=0.5, font=FONT)
+    return fig
+
+
+@instrumentation.traced
+def role_pie(role_counts):
+    if role_counts.empty:
+        return None
+    fig = px.pie(role_counts, values=role_counts.values, names=role_counts.index, title="<b>Tỷ lệ theo Vai trò chính</b>", hole=.4, color_discrete_sequence=px.colors.sequential.Agsunset)
+    fig.update_traces(textposition='inside', textinfo='percent+label'); fig.update_layout(title_x=0.5, font=FONT)
+    return fig
+
+
+# --- Tab 2: Kinh nghiệm & Kỹ năng ---
+@instrumentation.traced
+def experience_bar(exp_group_counts):
+    if exp_group_counts.empty:
+        return None
+    fig = px.bar(exp_group_counts, x=exp_group_counts.index, y=exp_group_counts.values, labels={'x':'Nhóm kinh nghiệm', 'y':'Số lượng tin'}, title="<b>Số tin theo Nhóm Kinh nghiệm</b>", color=exp_group_counts.index, color_discrete_sequence=px.colors.qualitative.Safe)
+    fig.update_layout(title_x=0.5, font=FONT)
+    return fig
+
+
+@instrumentation.traced
+def skills_bar(skill_counts):
+    if skill_counts.empty:
+        return None
+    fig = px.bar(skill_counts, y=skill_counts.index, x=skill_counts.values, orientation='h', labels={'y':'Kỹ năng/Tag', 'x':'Số lần xuất hiện'}, title="<b>Top 10 Kỹ năng/Tags</b>", color=skill_counts.values, color_continuous_scale=px.colors.sequential.Tealgrn)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, title_x=0.5, font=FONT)
+    return fig
+
+
+@instrumentation.traced
+def cooccurrence_heatmap(cooc):
+    if len(cooc) <= 1:
+        return None
+    fig = px.imshow(cooc, text_auto=True, labels={'color': 'Số tin'}, title="<b>Kỹ năng thường đi cùng nhau (Top 10)</b>", color_continuous_scale=px.colors.sequential.Tealgrn)
+    fig.update_layout(title_x=0.5, font=FONT)
+    return fig
+
+
+@instrumentation.traced
+def associated_skills_bar(assoc_skills, value):
+    if assoc_skills.empty:
+        return None
+    fig = px.bar(assoc_skills, y='skill', x='lift', orientation='h', hover_data=['postings'], labels={'skill':'Kỹ năng/Tag', 'lift':'Mức độ đặc trưng (lift)', 'postings':'Số tin'}, title=f"<b>Kỹ năng đặc trưng: {value}</b>", color='lift', color_continuous_scale=px.colors.sequential.Tealgrn)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, title_x=0.5, font=FONT)
+    return fig
+
+
+# --- Tab 3: Lương & Phúc lợi ---
+def _million_vnd(value):
+    return f"{value/1000000:,.1f} Tr" if pd.notna(value) else "N/A"
+
+
+@instrumentation.traced
+def salary_histogram(bins):
+    """Cột histogram lương tối thiểu đã đếm sẵn ở server (salary.histogram_bins)."""
+    if bins.empty or bins['count'].sum() == 0:
+        return None
+    plot_bins = bins.assign(bin_mid=(bins['bin_start'] + bins['bin_end']) / 2,
+                            bin_label=bins['bin_start'].map(_million_vnd) + " - " + bins['bin_end'].map(_million_vnd))
+    fig = px.bar(plot_bins, x='bin_mid', y='count', hover_data={'bin_mid': False, 'bin_label': True}, title="<b>Phân bổ Lương Tối thiểu (VND/tháng)</b>", labels={'bin_mid':'Lương tối thiểu (VND)', 'count':'Số tin', 'bin_label':'Khoảng lương'}, opacity=0.8, color_discrete_sequence=['#2ecc71'])
+    fig.update_layout(bargap=0.1, title_x=0.5, font=FONT)
+    return fig
+
+
+@instrumentation.traced
+def salary_overview(df_filtered):
+    """(tóm tắt lương, biểu đồ phân bổ lương tối thiểu) của các tin đang lọc."""
+    return salary.salary_summary(df_filtered), salary_histogram(salary.histogram_bins(df_filtered))
+
+
+@instrumentation.traced
+def salary_percentile_table(percentiles):
+    """Bảng phân vị lương tối thiểu theo vai trò (salary.role_percentiles), định dạng triệu đồng."""
+    table = percentiles.sort_values('p50', ascending=False)
+    return table.apply(lambda col: col.map(_million_vnd)).reset_index().rename(columns={'job_role_group':'Vai trò', 'p25':'P25 (Min)', 'p50':'Lương trung vị (Min)', 'p75':'P75 (Min)'})
+
+
+@instrumentation.traced
+def top_benefits(benefit_lists, n=10):
+    all_benefits = [b for benefits in benefit_lists for b in benefits]
+    return pd.Series(all_benefits).value_counts().head(n) if all_benefits else pd.Series(dtype='int64')
+
+
+@instrumentation.traced
+def benefits_bar(benefit_counts):
+    if benefit_counts.empty:
+        return None
+    fig = px.bar(benefit_counts, x=benefit_counts.index, y=benefit_counts.values, labels={'x':'Phúc lợi', 'y':'Số lần đề cập'}, title="<b>Top 10 Phúc lợi</b>", color=benefit_counts.values, color_continuous_scale=px.colors.sequential.Magenta)
+    fig.update_layout(xaxis_tickangle=-45, title_x=0.5, font=FONT)
+    return fig
+
+
+# --- Tab 4: Xu hướng thời gian ---
+@instrumentation.traced
+def monthly_trend_line(monthly_counts):
+    if monthly_counts.empty:
+        return None
+    fig = px.line(monthly_counts, x=monthly_counts.index, y=monthly_counts.values, markers=True, labels={'x':'Tháng/Năm đăng tin', 'y':'Số lượng tin'}, title='<b>Xu hướng số lượng tin đăng theo Tháng</b>')
+    fig.update_layout(xaxis_tickangle=-45, title_x=0.5, font=FONT)
+    return fig
@@ -0,0 +1,239 @@
+# cube.py
+"""Khối tổng hợp (cube) dựng sẵn cho KPI và các biểu đồ group-by.
+
+Mỗi ô của cube ứng với một tổ hợp (nguồn, địa điểm, vai trò, số năm kinh
+nghiệm, tháng đăng tin) và lưu: số tin, số tin có lương cụ thể, tổng lương
+tối thiểu, thời điểm xử lý mới nhất và một sketch phân vị lương có thể gộp.
+Mọi tổ hợp bộ lọc ở sidebar chỉ cần chọn các ô khớp rồi cộng dồn (roll-up),
+không phải quét lại từng dòng dữ liệu. Khi nạp batch mới, cube của batch được
+gộp vào (combined) và các dòng bị thay thế được trừ ra, không dựng lại từ đầu.
+
+Sketch phân vị là histogram theo bucket logarit (kiểu DDSketch): mỗi bucket giữ
+số đếm và tổng giá trị, gộp được bằng phép cộng. Giá trị đại diện của bucket là
+trung bình các giá trị rơi vào nó (chính xác khi bucket chỉ chứa một mức lương,
+trường hợp phổ biến với lương tròn số), sai số tương đối tối đa
+SKETCH_RELATIVE_ACCURACY.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DIMENSIONS = ['source_website', 'location_primary', 'job_role_group',
+              'experience_years_min_numeric', 'posted_year_month']
+SALARY_COLUMN = 'salary_min_vnd'
+SKETCH_RELATIVE_ACCURACY = 0.001
+_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+
+
+def experience_group_label(years):
+    """Nhóm kinh nghiệm hiển thị ở tab 2 (giống logic cũ group_experience_st)."""
+    if pd.isna(years): return "Không rõ"
+    if years == 0: return "0 (Fresher)"
+    if 1 <= years <= 2: return "1-2 năm"
+    if 3 <= years <= 5: return "3-5 năm"
+    if years > 5: return ">5 năm"
+    return "Khác"
+
+
+# --- Sketch phân vị theo bucket logarit ---
+def sketch_buckets(values):
+    """Chỉ số bucket cho các giá trị dương (bucket 0 dành cho giá trị <= 0)."""
+    values = np.asarray(values, dtype='float64')
+    buckets = np.zeros(len(values), dtype=np.int64)
+    positive = values > 0
+    buckets[positive] = np.ceil(np.log(values[positive]) / _LOG_GAMMA).astype(np.int64) + 1
+    return buckets
+
+
+def sketch_quantile(bucket_ids, bucket_counts, bucket_sums, q):
+    """Phân vị q từ histogram bucket (nội suy giữa hai hạng như Series.quantile)."""
+    total = bucket_counts.sum()
+    if total == 0:
+        return np.nan
+    order = np.argsort(bucket_ids)
+    cum = np.cumsum(bucket_counts[order])
+    bucket_means = bucket_sums[order] / bucket_counts[order]
+    rank = q * (total - 1)
+    lo, hi = int(np.floor(rank)), int(np.ceil(rank))
+    v_lo = bucket_means[np.searchsorted(cum, lo, side='right')]
+    v_hi = bucket_means[np.searchsorted(cum, hi, side='right')]
+    return float(v_lo + (v_hi - v_lo) * (rank - lo))
+
+
+class AggregateCube:
+    """Cube theo DIMENSIONS; mỗi ô giữ các độ đo cộng dồn được."""
+
+    def __init__(self, df):
+        self.dimensions = [d for d in DIMENSIONS if d in df.columns]
+        self.dim_values = {}
+        codes = []
+        for dim in self.dimensions:
+            dim_codes, uniques = pd.factorize(df[dim], use_na_sentinel=True)
+            self.dim_values[dim] = uniques
+            codes.append(dim_codes + 1)  # 0 = giá trị thiếu
+        shape = tuple(len(self.dim_values[d]) + 1 for d in self.dimensions)
+        flat = np.ravel_multi_index(codes, shape) if codes else np.zeros(len(df), dtype=np.int64)
+        cell_keys, row_cell = np.unique(flat, return_inverse=True)
+        n_cells = len(cell_keys)
+        self.cell_codes = dict(zip(self.dimensions, (c - 1 for c in np.unravel_index(cell_keys, shape))))
+
+        self.count = np.bincount(row_cell, minlength=n_cells)
+        latest = np.full(n_cells, np.iinfo(np.int64).min, dtype=np.int64)
+        if 'process_timestamp' in df.columns:
+            ts = pd.to_datetime(df['process_timestamp'], errors='coerce')
+            valid = ts.notna().to_numpy()
+            np.maximum.at(latest, row_cell[valid], ts[valid].to_numpy().astype('datetime64[ns]').view(np.int64))
+        self.latest_ns = latest
+
+        self.salary_count = np.zeros(n_cells, dtype=np.int64)
+        self.salary_sum = np.zeros(n_cells, dtype='float64')
+        self.salary_sketch = sparse.csr_matrix((n_cells, 1), dtype=np.int64)
+        self.salary_sketch_sum = sparse.csr_matrix((n_cells, 1), dtype='float64')
+        if SALARY_COLUMN in df.columns and 'salary_negotiable' in df.columns:
+            salary = pd.to_numeric(df[SALARY_COLUMN], errors='coerce')
+            has_salary = ((df['salary_negotiable'] == False) & salary.notna()).to_numpy(dtype=bool, na_value=False)
+            values = salary[has_salary].to_numpy(dtype='float64')
+            cells = row_cell[has_salary]
+            self.salary_count = np.bincount(cells, minlength=n_cells)
+            self.salary_sum = np.bincount(cells, weights=values, minlength=n_cells)
+            buckets = sketch_buckets(values)
+            sketch_shape = (n_cells, int(buckets.max()) + 1 if len(buckets) else 1)
+            self.salary_sketch = sparse.csr_matrix((np.ones(len(cells), dtype=np.int64), (cells, buckets)), shape=sketch_shape)
+            self.salary_sketch_sum = sparse.csr_matrix((values, (cells, buckets)), shape=sketch_shape)
+
+    def combined(self, other, sign=1):
+        """Cube mới = self + sign * other (sign=-1 để trừ các dòng bị thay thế).
+
+        Thời điểm cập nhật mới nhất chỉ lấy max, không trừ được.
+        """
+        result = AggregateCube.__new__(AggregateCube)
+        result.dimensions = self.dimensions
+        result.dim_values = {}
+        keys_a, keys_b, shape = [], [], []
+        for dim in self.dimensions:
+            values_a, values_b = pd.Index(self.dim_values[dim]), pd.Index(other.dim_values[dim])
+            missing = values_b[~values_b.isin(values_a)]
+            # Không nối Index rỗng: pandas sẽ đổi cách suy ra dtype khi nối với phần tử rỗng
+            unified = values_a
+            if len(missing):
+                unified = values_a.append(missing) if len(values_a) else missing
+            remap_b = np.append(unified.get_indexer(values_b), -1)  # code -1 (thiếu) giữ nguyên
+            result.dim_values[dim] = unified
+            keys_a.append(self.cell_codes[dim] + 1)
+            keys_b.append(remap_b[other.cell_codes[dim]] + 1)
+            shape.append(len(unified) + 1)
+        shape = tuple(shape)
+        flat = np.concatenate([np.ravel_multi_index(keys_a, shape), np.ravel_multi_index(keys_b, shape)])
+        cell_keys, cell_of = np.unique(flat, return_inverse=True)
+        n_cells = len(cell_keys)
+
+        def merge(a, b):
+            return np.bincount(cell_of, weights=np.concatenate([a, sign * b]), minlength=n_cells)
+        count = np.rint(merge(self.count, other.count)).astype(np.int64)
+        salary_count = np.rint(merge(self.salary_count, other.salary_count)).astype(np.int64)
+        salary_sum = merge(self.salary_sum, other.salary_sum)
+        latest = np.full(n_cells, np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(latest, cell_of, np.concatenate([self.latest_ns, other.latest_ns]))
+        width = max(self.salary_sketch.shape[1], other.salary_sketch.shape[1])
+        gather = sparse.csr_matrix((np.ones(len(cell_of), dtype=np.int64), (cell_of, np.arange(len(cell_of)))),
+                                   shape=(n_cells, len(cell_of)))
+
+        def merge_sketch(a, b):
+            a, b = a.copy(), (sign * b).tocsr()
+            a.resize((a.shape[0], width)); b.resize((b.shape[0], width))
+            merged = (gather @ sparse.vstack([a, b], format='csr')).tocsr()
+            merged.eliminate_zeros()
+            return merged
+
+        keep = count > 0
+        cell_codes = np.unravel_index(cell_keys[keep], shape)
+        result.cell_codes = dict(zip(self.dimensions, (c - 1 for c in cell_codes)))
+        result.count, result.salary_count, result.salary_sum = count[keep], salary_count[keep], salary_sum[keep]
+        result.latest_ns = latest[keep]
+        result.salary_sketch = merge_sketch(self.salary_sketch, other.salary_sketch)[keep]
+        result.salary_sketch_sum = merge_sketch(self.salary_sketch_sum, other.salary_sketch_sum)[keep]
+        return result
+
+    # --- Chọn ô theo bộ lọc ---
+    def _dim_mask(self, dim, predicate):
+        values = self.dim_values[dim]
+        allowed = np.array([predicate(v) for v in values] + [False], dtype=bool)  # phần tử cuối: giá trị thiếu (code -1)
+        return allowed[self.cell_codes[dim]]
+
+    def select_cells(self, source=None, location=None, role=None, exp_range=None):
+        """Mặt nạ bool trên các ô khớp bộ lọc (cùng ngữ nghĩa với FilterIndex.select)."""
+        mask = np.ones(len(self.count), dtype=bool)
+        for dim, value in zip(DIMENSIONS[:3], (source, location, role)):
+            if value is not None and dim in self.dim_values:
+                mask &= self._dim_mask(dim, lambda v, value=value: v == value)
+        exp_dim = 'experience_years_min_numeric'
+        if exp_range is not None and exp_dim in self.dim_values:
+            mask &= self._dim_mask(exp_dim, lambda v: exp_range[0] <= v <= exp_range[1])
+        return mask
+
+    # --- Roll-up ---
+    def total(self, cells):
+        return int(self.count[cells].sum())
+
+    def rollup(self, dim, cells, measure=None):
+        """Cộng dồn một độ đo (mặc định: số tin) theo một chiều; bỏ giá trị thiếu và ô rỗng."""
+        measure = self.count if measure is None else measure
+        sums = np.bincount(self.cell_codes[dim][cells] + 1, weights=measure[cells],
+                           minlength=len(self.dim_values[dim]) + 1)[1:]
+        result = pd.Series(sums.astype(measure.dtype), index=pd.Index(self.dim_values[dim], name=dim))
+        result = result[result > 0]
+        return result.iloc[np.argsort(-result.to_numpy(), kind='stable')]
+
+    def latest_update(self, cells):
+        latest = self.latest_ns[cells].max(initial=np.iinfo(np.int64).min)
+        return None if latest == np.iinfo(np.int64).min else pd.Timestamp(latest)
+
+    def median_experience(self, cells):
+        """Trung vị số năm kinh nghiệm (chính xác, từ số đếm theo từng giá trị)."""
+        counts = self.rollup('experience_years_min_numeric', cells)
+        if counts.empty:
+            return None
+        counts = counts.sort_index()
+        years, cum = counts.index.to_numpy(dtype='float64'), np.cumsum(counts.to_numpy())
+        total = cum[-1]
+        lo = years[np.searchsorted(cum, (total - 1) // 2, side='right')]
+        hi = years[np.searchsorted(cum, total // 2, side='right')]
+        return (lo + hi) / 2
+
+    def experience_group_counts(self, cells):
+        counts = self.rollup('experience_years_min_numeric', cells)
+        groups = counts.groupby(counts.index.map(experience_group_label), sort=False).sum()
+        return groups.iloc[np.argsort(-groups.to_numpy(), kind='stable')]
+
+    def monthly_counts(self, cells):
+        """Số tin theo tháng (nhãn cuối tháng, điền 0 cho tháng trống như resample('M'))."""
+        counts = self.rollup('posted_year_month', cells)
+        if counts.empty:
+            return counts
+        counts = counts.sort_index()
+        months = pd.period_range(counts.index.min(), counts.index.max(), freq='M')
+        counts = counts.reindex(months, fill_value=0)
+        counts.index = months.to_timestamp(how='end').normalize()
+        return counts
+
+    def salary_quantile_by(self, dim, cells, q=0.5):
+        """Phân vị lương tối thiểu theo từng giá trị của một chiều (gộp sketch của các ô)."""
+        return self.salary_quantiles_by(dim, cells, [q])[q].rename(None)
+
+    def salary_quantiles_by(self, dim, cells, qs):
+        """Nhiều phân vị lương tối thiểu theo từng giá trị của một chiều: DataFrame, mỗi cột một q."""
+        cell_idx = np.flatnonzero(cells & (self.salary_count > 0))
+        dim_codes = self.cell_codes[dim][cell_idx]
+        valid = dim_codes >= 0
+        cell_idx, dim_codes = cell_idx[valid], dim_codes[valid]
+        group = sparse.csr_matrix((np.ones(len(cell_idx), dtype=np.int64), (dim_codes, cell_idx)),
+                                  shape=(len(self.dim_values[dim]), len(self.count)))
+        merged = (group @ self.salary_sketch).tocsr()
+        merged_sum = (group @ self.salary_sketch_sum).tocsr()
+        result = {}
+        for g in np.unique(dim_codes):
+            row, row_sum = merged.getrow(g), merged_sum.getrow(g)
+            sums = row_sum.toarray().ravel()[row.indices]
+            result[self.dim_values[dim][g]] = [sketch_quantile(row.indices, row.data, sums, q) for q in qs]
+        return pd.DataFrame.from_dict(result, orient='index', columns=list(qs)).astype('float64')
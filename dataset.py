@@ -0,0 +1,422 @@
+# dataset.py
+"""Bộ dữ liệu của dashboard và các nguồn dữ liệu tự làm mới.
+
+Dataset gói DataFrame đã tiền xử lý cùng các cấu trúc dẫn xuất (chỉ mục lọc,
+ma trận kỹ năng, cube tổng hợp). Dataset không bị sửa tại chỗ: nạp thêm dữ liệu
+tạo ra một Dataset mới, nên phiên nào đang giữ bản cũ vẫn thấy dữ liệu nhất quán.
+Dữ liệu được giữ thành các chunk chỉ đọc nối tiếp nhau (khung ban đầu + các batch);
+Dataset mới dùng lại nguyên các chunk cũ và chỉ thêm chunk của batch, nên không chép
+lại toàn bộ lịch sử. Các chunk nhỏ ở cuối được gộp dần (như bộ đếm nhị phân) để số
+chunk chỉ tăng theo log(số dòng).
+
+Mỗi tiến trình giữ một Dataset dùng chung cho mọi phiên. Mọi mảng dữ liệu của nó
+được đặt chỉ đọc (freeze_cells / freeze_frame / freeze_arrays); phiên chỉ làm việc trên
+mảng vị trí dòng và lấy bản sao riêng của đúng các dòng/cột cần (Dataset.rows).
+
+Hai nguồn dữ liệu:
+- CsvSnapshotSource: snapshot Parquet của data_cleaned.csv; CSV đổi -> dựng lại.
+- PartitionedStoreSource: kho phân vùng do ingest.py ghi; có batch mới -> chỉ
+  đọc các part mới, đánh dấu chết các dòng có tombstone mới và cập nhật tăng dần
+  chỉ mục/ma trận/cube. Khi tỷ lệ dòng chết vượt COMPACT_DEAD_FRACTION, Dataset
+  được nén lại (bỏ hẳn dòng chết, dựng lại các cấu trúc trên các dòng còn sống).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from scipy import sparse
+
+import snapshot
+import ingest
+import job_roles
+import instrumentation
+import salary
+from filter_index import FilterIndex
+from skill_matrix import SkillMatrix
+from cube import AggregateCube
+
+INTERNAL_COLUMNS = ['_part', '_part_row']
+COMPACT_DEAD_FRACTION = 0.25
+
+
+def prepare_frame(df):
+    """Thêm các cột dẫn xuất theo dòng (tháng đăng tin, nhóm vai trò, lương trung bình)."""
+    # Phân loại vai trò đo thành span riêng, các cột dẫn xuất còn lại thuộc span prepare_frame
+    roles = None
+    if 'job_title' in df.columns:
+        with instrumentation.span('role_classification', rows_in=len(df)):
+            roles = job_roles.categorize_job_roles(df['job_title'])
+    with instrumentation.span('prepare_frame', rows_in=len(df)):
+        if 'posted_datetime' in df.columns:
+            df['posted_year_month'] = df['posted_datetime'].dt.to_period('M')
+        if roles is not None:
+            df['job_role_group'] = roles
+        salary.add_salary_columns(df)
+    return df
+
+
+def _all_na_columns_aligned(frames, columns):
+    """Ép cột toàn NA của một frame (thường là batch nhỏ) về kiểu của các frame còn lại.
+
+    Parquet không giữ kiểu categorical của cột toàn null, và pandas sắp thôi bỏ qua cột
+    toàn NA khi suy ra dtype lúc nối; không ép thì cột categorical rơi về object.
+    """
+    casts = [{} for _ in frames]
+    for col in columns:
+        dtypes = [f[col].dtype for f in frames]
+        if all(d == dtypes[0] for d in dtypes):
+            continue
+        all_na = [f[col].isna().all() for f in frames]
+        reference = next((d for d, na in zip(dtypes, all_na) if not na), None)
+        if reference is None:
+            continue
+        for cast, dtype, na in zip(casts, dtypes, all_na):
+            if na and dtype != reference:
+                cast[col] = reference
+    return [f.astype(cast) if cast else f for f, cast in zip(frames, casts)]
+
+
+def concat_frames(frames, ignore_index=True):
+    """Nối các DataFrame, giữ kiểu categorical (hợp các category) thay vì rơi về object."""
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True) if ignore_index else frames[0]
+    columns = frames[0].columns
+    frames = _all_na_columns_aligned(frames, columns)
+    categorical = [c for c in columns if all(isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames)]
+    combined = pd.concat([f.drop(columns=categorical) for f in frames], ignore_index=ignore_index)
+    for col in categorical:
+        combined[col] = union_categoricals([f[col] for f in frames])
+    return combined[list(columns)]
+
+
+def _backing_arrays(values):
+    """Các mảng numpy chứa dữ liệu của một block (ndarray hoặc ExtensionArray)."""
+    if isinstance(values, np.ndarray):
+        return [values]
+    return [getattr(values, attr) for attr in ('_ndarray', '_data', '_mask')
+            if isinstance(getattr(values, attr, None), np.ndarray)]
+
+
+def freeze_cells(df):
+    """Đặt chỉ đọc các mảng list trong từng ô (skills, phúc lợi).
+
+    Gọi một lần khi part / snapshot vừa được đọc và parse: nối hoặc lấy dòng về sau chỉ
+    chép con trỏ tới cùng các mảng này, nên không phải quét lại từng ô.
+    """
+    for col in df.columns[(df.dtypes == object).to_numpy()]:
+        for item in df[col].to_numpy():
+            if isinstance(item, np.ndarray):
+                item.flags.writeable = False
+    return df
+
+
+def freeze_frame(df):
+    """Đặt chỉ đọc các mảng dữ liệu (block) của df; ô list đã được khóa từ trước bởi freeze_cells."""
+    # Đi qua các block nội bộ: đặt chỉ đọc trên một view (df[col].to_numpy()) không khóa được mảng gốc
+    for block in df._mgr.blocks:
+        for array in _backing_arrays(block.values):
+            array.flags.writeable = False
+    return df
+
+
+def freeze_arrays(obj):
+    """Đặt chỉ đọc các mảng numpy / ma trận thưa là thuộc tính của obj (chỉ mục, ma trận, cube)."""
+    def freeze(value):
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        elif sparse.issparse(value):
+            value.sum_duplicates()  # chuẩn hóa trước, để scipy không cần sắp xếp lại tại chỗ về sau
+            for array in (value.data, value.indices, value.indptr):
+                array.flags.writeable = False
+        elif isinstance(value, dict):
+            for item in value.values():
+                freeze(item)
+    for value in vars(obj).values():
+        freeze(value)
+    return obj
+
+
+def _positioned(df, start):
+    """Bản nông của df với nhãn index là vị trí dòng trong Dataset (start, start + 1, ...)."""
+    df = df.copy(deep=False)
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
+
+
+def _merged_chunks(chunks):
+    """Gộp các chunk cuối khi chunk trước không lớn hơn chunk sau (như bộ đếm nhị phân).
+
+    Mỗi dòng chỉ bị chép lại O(log(số dòng)) lần, số chunk cũng chỉ O(log(số dòng)).
+    """
+    chunks = list(chunks)
+    while len(chunks) > 1 and len(chunks[-2]) <= len(chunks[-1]):
+        start = chunks[-2].index[0]
+        chunks[-2:] = [freeze_frame(_positioned(concat_frames(chunks[-2:]), start))]
+    return chunks
+
+
+class Dataset:
+    """DataFrame đã tiền xử lý + các cấu trúc dẫn xuất, dựng một lần cho mỗi phiên bản dữ liệu."""
+
+    def __init__(self, df, version, part_rows=None):
+        self._set_chunks([freeze_frame(df)])
+        self.version = version
+        # part -> vị trí trong df của từng dòng trong file part (-1: dòng không được nạp)
+        self.part_rows = part_rows or {}
+        self.dead_rows = np.empty(0, dtype=np.int64)
+        with instrumentation.span('filter_index_build', rows_in=len(df)):
+            self.filter_index = FilterIndex(df)
+        with instrumentation.span('skill_matrix_build', rows_in=len(df)):
+            self.skill_matrix = SkillMatrix(df['parsed_skills_or_tags']) if 'parsed_skills_or_tags' in df.columns else None
+        with instrumentation.span('cube_build', rows_in=len(df)):
+            self.cube = AggregateCube(df)
+        self._freeze_structures()
+
+    def _freeze_structures(self):
+        for structure in (self.filter_index, self.skill_matrix, self.cube):
+            if structure is not None:
+                freeze_arrays(structure)
+        for positions in self.part_rows.values():
+            positions.flags.writeable = False
+
+    def _set_chunks(self, chunks):
+        self._chunks = chunks
+        lengths = [len(chunk) for chunk in chunks]
+        self._chunk_starts = np.cumsum([0] + lengths[:-1]).astype(np.int64)
+        self.n_rows = sum(lengths)
+        self._full = chunks[0] if len(chunks) == 1 else None
+        self._column_cache = {}
+        # Cột categorical: hợp các category theo thứ tự chunk (giống khi nối cả khung)
+        self._categories = {}
+        if len(chunks) > 1:
+            dtypes = [chunk.dtypes for chunk in chunks]
+            for col in chunks[0].columns:
+                if not all(isinstance(d[col], pd.CategoricalDtype) for d in dtypes):
+                    continue
+                categories = dtypes[0][col].categories
+                for d in dtypes[1:]:
+                    missing = d[col].categories[~d[col].categories.isin(categories)]
+                    if len(missing):
+                        categories = categories.append(missing)
+                self._categories[col] = categories
+
+    def __len__(self):
+        """Số vị trí dòng, kể cả các dòng chết chưa được nén."""
+        return self.n_rows
+
+    @property
+    def columns(self):
+        return self._chunks[0].columns
+
+    @property
+    def df(self):
+        """Khung dữ liệu dùng chung: bản nông (chung mảng chỉ đọc), nên phiên thêm/đổi cột không ảnh hưởng phiên khác.
+
+        Khi có nhiều chunk, khung đầy đủ được nối ở lần gọi đầu (tốn O(số dòng)) rồi nhớ lại;
+        code chạy ở mỗi lần rerun nên dùng rows() / column() / columns.
+        """
+        full = self._full
+        if full is None:
+            full = self._full = freeze_frame(concat_frames(self._chunks))
+        return full.copy(deep=False)
+
+    def column(self, name):
+        """Một cột (chỉ đọc) trên mọi dòng; nối từ các chunk ở lần gọi đầu rồi nhớ lại."""
+        values = self._column_cache.get(name)
+        if values is None:
+            if self._full is not None:
+                values = self._full[name]
+            else:
+                values = freeze_frame(concat_frames([chunk[[name]] for chunk in self._chunks]))[name]
+            self._column_cache[name] = values
+        return values
+
+    def rows(self, positions, columns=None):
+        """Bản sao riêng của các dòng tại positions (chỉ các cột columns nếu có), giữ nhãn index gốc."""
+        columns = list(self.columns) if columns is None else [c for c in columns if c in self.columns]
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(self._chunks) == 1:
+            chunk = self._chunks[0]
+            return pd.DataFrame({col: chunk[col].take(positions) for col in columns})
+        # Lấy dòng từ từng chunk chứa chúng; chi phí theo số dòng được chọn, không theo cả dữ liệu
+        chunk_of = np.searchsorted(self._chunk_starts, positions, side='right') - 1
+        pieces = []
+        for c in np.unique(chunk_of):
+            chunk, local = self._chunks[c], positions[chunk_of == c] - self._chunk_starts[c]
+            pieces.append(pd.DataFrame({col: chunk[col].take(local) for col in columns}))
+        if not pieces:
+            pieces = [pd.DataFrame({col: self._chunks[0][col].iloc[:0] for col in columns})]
+        result = concat_frames(pieces, ignore_index=False)
+        if (np.diff(chunk_of) < 0).any():
+            result = result.iloc[np.argsort(np.argsort(chunk_of, kind='stable'))]  # về lại thứ tự của positions
+        for col in columns:
+            if col in self._categories:
+                result[col] = result[col].cat.set_categories(self._categories[col])
+        return result
+
+    def appended(self, df_new, new_part_rows, removed, version):
+        """Dataset mới gồm dữ liệu hiện tại + df_new, bỏ các dòng trong removed.
+
+        new_part_rows: part -> vị trí (trong df_new) các dòng của part mới.
+        removed: part -> vị trí dòng trong file part bị loại (None = cả part); part có
+        thể là part cũ hoặc part mới. Nén lại khi tỷ lệ dòng chết vượt COMPACT_DEAD_FRACTION.
+        """
+        n_old = self.n_rows
+        result = Dataset.__new__(Dataset)
+        if len(df_new):
+            result._set_chunks(_merged_chunks(self._chunks + [freeze_frame(_positioned(df_new, n_old))]))
+        else:
+            result._set_chunks(list(self._chunks))
+        result.version = version
+        result.part_rows = dict(self.part_rows)
+        result.part_rows.update({p: np.where(rows >= 0, rows + n_old, -1) for p, rows in new_part_rows.items()})
+        dead = [result.part_rows[p] if rows is None else result.part_rows[p][np.asarray(rows, dtype=np.int64)]
+                for p, rows in removed.items() if p in result.part_rows]
+        for p, rows in removed.items():
+            if rows is None:
+                result.part_rows.pop(p, None)
+        dead = np.concatenate(dead).astype(np.int64) if dead else np.empty(0, dtype=np.int64)
+        dead = np.setdiff1d(dead[dead >= 0], self.dead_rows)  # mỗi dòng chỉ bị trừ một lần
+        result.dead_rows = np.union1d(self.dead_rows, dead)
+        if len(result.dead_rows) > COMPACT_DEAD_FRACTION * result.n_rows:
+            return result.compacted()
+        result.filter_index = self.filter_index.appended(df_new, dead)
+        result.skill_matrix = self.skill_matrix.appended(df_new['parsed_skills_or_tags'], dead) if self.skill_matrix is not None else None
+        result.cube = self.cube.combined(AggregateCube(df_new))
+        if len(dead):
+            result.cube = result.cube.combined(AggregateCube(result.rows(dead)), sign=-1)
+        result._freeze_structures()
+        return result
+
+    def compacted(self):
+        """Dataset mới chỉ gồm các dòng còn sống (dựng lại chỉ mục/ma trận/cube)."""
+        live = np.ones(self.n_rows, dtype=bool)
+        live[self.dead_rows] = False
+        remap = np.where(live, np.cumsum(live) - 1, -1)
+        part_rows = {p: np.where(rows >= 0, remap[rows], -1) for p, rows in self.part_rows.items()}
+        with instrumentation.span('dataset_compact', rows_in=self.n_rows) as s:
+            df = self.rows(np.flatnonzero(live)).reset_index(drop=True)
+            s.set_rows_out(len(df))
+            return Dataset(df, self.version, part_rows)
+
+    def filter_options(self, column):
+        """Các giá trị (đã sắp xếp) còn dữ liệu của một chiều lọc, lấy từ cube thay vì quét cột."""
+        if column not in self.cube.dimensions:
+            return []
+        return sorted(self.cube.rollup(column, np.ones(len(self.cube.count), dtype=bool)).index.tolist())
+
+    def experience_bounds(self):
+        """(min, max) số năm kinh nghiệm tối thiểu trong dữ liệu, hoặc None."""
+        years = self.filter_options('experience_years_min_numeric')
+        return (int(years[0]), int(years[-1])) if years else None
+
+
+class CsvSnapshotSource:
+    """Nguồn dữ liệu từ snapshot Parquet của một file CSV."""
+
+    def __init__(self, csv_file_name):
+        self.csv_file_name = csv_file_name
+        self.manifest = None
+        self._dataset = None
+        self._raw = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Dataset mới nhất; dựng lại khi CSV hoặc luật vai trò thay đổi."""
+        with self._lock:
+            with instrumentation.span('snapshot_check'):
+                manifest = snapshot.ensure_snapshot(self.csv_file_name)
+            version = f"{snapshot.data_version(manifest)}-{job_roles.rules_version()}"
+            if self._dataset is None or self._dataset.version != version:
+                with instrumentation.span('snapshot_load') as s:
+                    df = snapshot.load_core(self.csv_file_name, manifest)
+                    s.set_rows_out(len(df))
+                df = freeze_cells(prepare_frame(df))
+                self._dataset, self.manifest, self._raw = Dataset(df, version), manifest, None
+            return self._dataset
+
+    def raw_columns(self, df_view):
+        """Cột văn bản thô cho các dòng đang xem (đọc lười, nhớ lại cho các lần sau)."""
+        with self._lock:
+            if self._raw is None:
+                self._raw = snapshot.load_raw_columns(self.csv_file_name, self.manifest)
+            df_raw = self._raw
+        return df_raw.loc[df_view.index]
+
+
+class PartitionedStoreSource:
+    """Nguồn dữ liệu từ kho phân vùng; batch mới được nạp tăng dần."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.manifest = None
+        self._dataset = None
+        self._lock = threading.Lock()
+
+    def _load_parts(self, parts, manifest, drop_tombstones=False):
+        """Khung dữ liệu của các part + part -> vị trí từng dòng của part trong khung.
+
+        drop_tombstones: bỏ luôn các dòng có tombstone (vị trí -1) thay vì để Dataset đánh dấu chết.
+        """
+        tombstones = ingest.part_tombstones(manifest)
+        with instrumentation.span('store_load_parts') as s:
+            frames = ingest.load_parts(self.store_dir, parts, columns=manifest['core_columns'])
+            if drop_tombstones:
+                frames = [f.drop(index=f.index[tombstones[p]]) if tombstones.get(p) else f for p, f in zip(parts, frames)]
+            s.set_rows_out(sum(len(f) for f in frames))
+        part_rows, start = {}, 0
+        for part, frame in zip(parts, frames):
+            positions = np.full(manifest['parts'][part], -1, dtype=np.int64)
+            positions[frame['_part_row'].to_numpy()] = np.arange(start, start + len(frame))
+            part_rows[part] = positions; start += len(frame)
+        return freeze_cells(prepare_frame(concat_frames(frames))), part_rows
+
+    def current(self):
+        """Dataset mới nhất; chỉ đọc các part thêm vào kể từ lần trước."""
+        with self._lock:
+            manifest = ingest.read_store_manifest(self.store_dir)
+            if manifest is None:
+                raise FileNotFoundError(ingest.manifest_path(self.store_dir))
+            rules = job_roles.rules_version()
+            version = f"{ingest.store_data_version(manifest)}-{rules}"
+            dataset = self._dataset
+            if not manifest['parts']:
+                raise ValueError(f"Kho dữ liệu '{self.store_dir}' chưa có dòng nào.")
+            if dataset is None or not dataset.version.endswith(f"-{rules}"):
+                df, part_rows = self._load_parts(list(manifest['parts']), manifest, drop_tombstones=True)
+                self._dataset = Dataset(df, version, part_rows)
+            elif dataset.version != version:
+                added = [p for p in manifest['parts'] if p not in self.manifest['parts']]
+                removed = {p: None for p in self.manifest['parts'] if p not in manifest['parts']}
+                # Tombstone mới trên các part đã nạp, và mọi tombstone của các part mới
+                old_tombstones, new_tombstones = ingest.part_tombstones(self.manifest), ingest.part_tombstones(manifest)
+                for part, rows in new_tombstones.items():
+                    fresh = sorted(set(rows) - set(old_tombstones.get(part, []))) if part not in added else rows
+                    if fresh and part in manifest['parts']:
+                        removed[part] = fresh
+                if added:
+                    df_new, new_part_rows = self._load_parts(added, manifest)
+                else:
+                    df_new, new_part_rows = dataset.rows(np.empty(0, dtype=np.int64)), {}
+                with instrumentation.span('dataset_append', rows_in=len(df_new)):
+                    self._dataset = dataset.appended(df_new, new_part_rows, removed, version)
+            self.manifest = manifest
+            return self._dataset
+
+    def raw_columns(self, df_view):
+        return ingest.load_raw_columns(self.store_dir, self.manifest, df_view)
+
+
+def store_ready(store_dir):
+    """Kho phân vùng đã được khởi tạo và có dữ liệu."""
+    manifest = ingest.read_store_manifest(store_dir) if store_dir else None
+    return manifest is not None and bool(manifest['parts'])
+
+
+def open_source(csv_file_name, store_dir=None):
+    """Kho phân vùng nếu đã được khởi tạo, ngược lại snapshot của file CSV."""
+    if store_ready(store_dir):
+        return PartitionedStoreSource(store_dir)
+    return CsvSnapshotSource(csv_file_name)
@@ -3,11 +3,15 @@ import streamlit as st
 import pandas as pd
 # import sqlite3 # Không cần thiết khi đọc từ CSV đã xử lý
 import os
-import json
 import matplotlib.pyplot as plt 
 import seaborn as sns
-import plotly.express as px 
 from collections import Counter
+import uuid
+
+import dataset as ds
+import analytics
+import instrumentation
+from figure_cache import FigureCache
 
 # --- Cấu hình Trang Streamlit ---
 st.set_page_config(
@@ -22,60 +26,51 @@ st.set_page_config(
     }
 )
 
-# --- Tên file CSV chứa dữ liệu tổng hợp đã làm sạch ---
-DATA_CSV_FILENAME = "data_cleaned.csv" # Đảm bảo tên file này đúng
+# --- Đo thời gian các bước: lấy mẫu theo DASHBOARD_TRACE_SAMPLE_RATE, hoặc luôn đo khi mở với ?debug=1 ---
+TRACE_CONFIG = instrumentation.TraceConfig.from_env()
+debug_panel_enabled = st.query_params.get("debug") == "1"
+if 'trace_session_id' not in st.session_state:
+    st.session_state['trace_session_id'] = uuid.uuid4().hex[:12]
+    st.session_state['trace_rerun'] = 0
+st.session_state['trace_rerun'] += 1
+instrumentation.begin_trace(TRACE_CONFIG, session_id=st.session_state['trace_session_id'],
+                            rerun=st.session_state['trace_rerun'], force=debug_panel_enabled)
 
-# --- Hàm Tải Dữ Liệu từ CSV (có cache) ---
-@st.cache_data 
-def load_data_from_csv(csv_file_name):
-    """Tải dữ liệu từ file CSV và thực hiện các chuyển đổi kiểu cơ bản."""
+# --- Dữ liệu: file CSV analytics.DATA_CSV_FILENAME, hoặc kho phân vùng analytics.DATA_STORE_DIR (ingest.py) ---
+# Nguồn dữ liệu được analytics giữ chung cho mọi phiên trong tiến trình
+def load_dataset_or_error(csv_file_name, store_dir):
+    """analytics.load_dataset kèm thông báo lỗi cho giao diện; trả về (dataset, lỗi)."""
     try:
-        df = pd.read_csv(csv_file_name)
-        if not df.empty:
-            if 'posted_datetime_str' in df.columns:
-                df['posted_datetime'] = pd.to_datetime(df['posted_datetime_str'], errors='coerce')
-                if df['posted_datetime'].notna().any():
-                    df['posted_year_month'] = df['posted_datetime'].dt.to_period('M')
-            
-            numeric_cols = ['salary_min_vnd', 'salary_max_vnd', 'days_to_deadline', 
-                            'experience_years_min_numeric', 'views_count']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
-            
-            def parse_json_list_safe(json_string):
-                if pd.isna(json_string) or not isinstance(json_string, str): return []
-                try:
-                    if json_string.strip() == '[]': return []
-                    data = json.loads(json_string)
-                    return data if isinstance(data, list) else []
-                except json.JSONDecodeError: return []
-
-            df['parsed_skills_or_tags'] = pd.Series([[] for _ in range(len(df))], dtype=object)
-            if 'skills_list_json_vnw' in df.columns:
-                mask_vnw_skills = df['source_website'] == 'VietnamWorks'
-                df.loc[mask_vnw_skills, 'parsed_skills_or_tags'] = df.loc[mask_vnw_skills, 'skills_list_json_vnw'].apply(parse_json_list_safe)
-            if 'job_tags_list_json_cv' in df.columns:
-                mask_cv_tags = df['source_website'] == 'CareerViet'
-                df.loc[mask_cv_tags & (df['parsed_skills_or_tags'].apply(len) == 0), 'parsed_skills_or_tags'] = \
-                    df.loc[mask_cv_tags, 'job_tags_list_json_cv'].apply(parse_json_list_safe)
-        return df, None 
+        return analytics.load_dataset(csv_file_name, store_dir), None
     except FileNotFoundError:
-        st.error(f"LỖI: File CSV '{csv_file_name}' không tìm thấy. Hãy đảm bảo file này tồn tại trong repository GitHub của bạn (thường là cùng cấp với file app này).")
-        return pd.DataFrame(), f"LỖI: File CSV '{csv_file_name}' không tìm thấy."
+        return None, f"LỖI: File CSV '{csv_file_name}' không tìm thấy. Hãy đảm bảo file này tồn tại trong repository GitHub của bạn (thường là cùng cấp với file app này)."
     except Exception as e:
         st.error(f"Lỗi khi tải hoặc xử lý dữ liệu từ CSV '{csv_file_name}': {e}")
-        return pd.DataFrame(), f"Lỗi khi tải hoặc xử lý dữ liệu từ CSV: {e}"
+        return None, f"Lỗi khi tải hoặc xử lý dữ liệu từ CSV: {e}"
+
+def with_raw_columns(df_view, csv_file_name, store_dir):
+    """Ghép các cột văn bản thô (nạp lười) vào các dòng đang xem, giữ thứ tự cột như file CSV gốc."""
+    source = analytics.open_source(csv_file_name, store_dir)
+    df_full = df_view.join(source.raw_columns(df_view)).drop(columns=ds.INTERNAL_COLUMNS, errors='ignore')
+    ordered = [c for c in source.manifest['csv_columns'] if c in df_full.columns]
+    return df_full[ordered + [c for c in df_full.columns if c not in ordered]]
+
+# --- Cache biểu đồ dùng chung cho mọi phiên (giới hạn dung lượng) ---
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(max_bytes=FIGURE_CACHE_MAX_BYTES)
 
-# --- Hàm tạo cột Job Role Group ---
-def categorize_job_role_st(title):
-    title_lower = str(title).lower()
-    if any(kw in title_lower for kw in ['hr data analyst']): return 'HR Data Analyst'
-    if any(kw in title_lower for kw in ['data analyst', 'phân tích dữ liệu', 'bi analyst', 'business intelligence analyst', 'insight analyst', 'data analytics', 'quantitative researcher']): return 'Data Analyst'
-    if any(kw in title_lower for kw in ['business analyst', 'phân tích kinh doanh', 'phân tích nghiệp vụ', 'it ba', 'technical business analyst', 'system analyst', 'phân tích hệ thống', 'process analyst']): return 'Business Analyst'
-    if any(kw in title_lower for kw in ['product owner']): return 'Product Owner'
-    if any(kw in title_lower for kw in ['product manager']): return 'Product Manager'
-    return 'Khác'
+def show_chart(fig):
+    """st.plotly_chart kèm đo thời gian tuần tự hóa biểu đồ."""
+    with instrumentation.span('render_chart'):
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_table(df):
+    """st.dataframe kèm đo thời gian tuần tự hóa bảng."""
+    with instrumentation.span('render_table', rows_in=len(df)):
+        st.dataframe(df)
 
 # --- CSS Tùy chỉnh ---
 def load_custom_css():
@@ -157,7 +152,12 @@ def load_custom_css():
     """, unsafe_allow_html=True)
 
 # --- Tải dữ liệu ---
-df_master, error_message = load_data_from_csv(DATA_CSV_FILENAME) 
+with instrumentation.span('load_dataset') as load_span:
+    dataset, error_message = load_dataset_or_error(analytics.DATA_CSV_FILENAME, analytics.DATA_STORE_DIR)
+    # Chỉ cần số dòng và tên cột: không dựng khung đầy đủ từ các chunk của Dataset
+    n_master_rows = len(dataset) if dataset is not None else 0
+    master_columns = dataset.columns if dataset is not None else pd.Index([])
+    load_span.set_rows_out(n_master_rows)
 
 # --- Xây dựng Giao diện Streamlit ---
 load_custom_css() 
@@ -168,153 +168,157 @@ st.markdown("---")
 
 if error_message: 
     st.error(error_message)
-elif df_master.empty:
+elif n_master_rows == 0:
     st.warning("Hiện không có dữ liệu để hiển thị. Vui lòng kiểm tra lại file CSV hoặc chạy script thu thập/xử lý dữ liệu.")
 else:
-    if 'job_title' in df_master.columns and 'job_role_group' not in df_master.columns:
-        df_master['job_role_group'] = df_master['job_title'].apply(categorize_job_role_st)
-
     # --- Sidebar cho Bộ lọc ---
     st.sidebar.image("https://i.ibb.co/3ySXFK2M/496510428-2054206478392683-5625031274161836120-n.jpg", caption="Data Analytics", use_container_width=True) 
     st.sidebar.header("Bộ lọc Dữ liệu 🛠️")
-    source_options = ["Tất cả"] + sorted(df_master['source_website'].unique().tolist()) if 'source_website' in df_master.columns else ["Tất cả"]
+    source_options = ["Tất cả"] + dataset.filter_options('source_website')
     selected_source = st.sidebar.selectbox("Nguồn Website:", source_options, help="Chọn nguồn dữ liệu bạn muốn xem.")
-    location_options = ["Tất cả"] + sorted(df_master['location_primary'].dropna().unique().tolist()) if 'location_primary' in df_master.columns else ["Tất cả"]
+    location_options = ["Tất cả"] + dataset.filter_options('location_primary')
     selected_location = st.sidebar.selectbox("Địa điểm:", location_options, help="Lọc theo thành phố/khu vực chính.")
     selected_role = "Tất cả"
-    if 'job_role_group' in df_master.columns:
-        role_options = ["Tất cả"] + sorted(df_master['job_role_group'].dropna().unique().tolist())
+    if 'job_role_group' in master_columns:
+        role_options = ["Tất cả"] + dataset.filter_options('job_role_group')
         selected_role = st.sidebar.selectbox("Vai trò chính:", role_options, help="Lọc theo nhóm vai trò công việc.")
     min_exp_data, max_exp_data = 0, 20 
-    if 'experience_years_min_numeric' in df_master.columns and df_master['experience_years_min_numeric'].notna().any():
-        min_exp_data_val = df_master['experience_years_min_numeric'].min(skipna=True); max_exp_data_val = df_master['experience_years_min_numeric'].max(skipna=True)
-        if pd.notna(min_exp_data_val): min_exp_data = int(min_exp_data_val)
-        if pd.notna(max_exp_data_val): max_exp_data = int(max_exp_data_val)
-        if max_exp_data < min_exp_data : max_exp_data = min_exp_data 
+    if dataset.experience_bounds() is not None:
+        min_exp_data, max_exp_data = dataset.experience_bounds()
     selected_exp_range = st.sidebar.slider("Số năm kinh nghiệm tối thiểu:", min_exp_data, max_exp_data, (min_exp_data, max_exp_data))
     
     # Checkbox để hiển thị toàn bộ dữ liệu
     show_all_data_checkbox = st.sidebar.checkbox("Hiển thị toàn bộ dữ liệu (sau lọc)", value=False, key="show_all_data")
 
-    # Áp dụng bộ lọc
-    df_filtered = df_master.copy()
-    if selected_source != "Tất cả" and 'source_website' in df_filtered.columns: df_filtered = df_filtered[df_filtered['source_website'] == selected_source]
-    if selected_location != "Tất cả" and 'location_primary' in df_filtered.columns: df_filtered = df_filtered[df_filtered['location_primary'] == selected_location]
-    if 'job_role_group' in df_filtered.columns and selected_role != "Tất cả": df_filtered = df_filtered[df_filtered['job_role_group'] == selected_role]
-    if 'experience_years_min_numeric' in df_filtered.columns and not df_filtered.empty: 
-        df_filtered = df_filtered[(df_filtered['experience_years_min_numeric'] >= selected_exp_range[0]) & (df_filtered['experience_years_min_numeric'] <= selected_exp_range[1])]
+    # Áp dụng bộ lọc: AND các bitmap dựng sẵn; phiên chỉ giữ vị trí dòng, dữ liệu dùng chung không bị sao chép
+    with instrumentation.span('sidebar_filter', rows_in=n_master_rows) as filter_span:
+        # KPI và các biểu đồ group-by được trả lời bằng roll-up trên cube, không quét dòng
+        selection = analytics.Selection(
+            dataset,
+            source=None if selected_source == "Tất cả" else selected_source,
+            location=None if selected_location == "Tất cả" else selected_location,
+            role=None if selected_role == "Tất cả" else selected_role,
+            exp_range=selected_exp_range)
+        selected_rows, aggregate_cube = selection.rows, dataset.cube
+        n_filtered = len(selection)
+        filter_span.set_rows_out(n_filtered)
+    if instrumentation.current_trace() is not None:
+        instrumentation.current_trace().annotate(data_version=dataset.version, filters=[selected_source, selected_location, selected_role, list(selected_exp_range)])
     
     # --- Hiển thị Thông tin Tổng quan ---
     st.header("📈 Tổng Quan Dữ Liệu (Sau lọc)") 
-    if not df_filtered.empty:
-        total_jobs_filtered = len(df_filtered)
+    if n_filtered:
+        kpi_values = analytics.kpis(selection)
+        total_jobs_filtered = kpi_values['total_jobs']
         latest_update_time = "Không rõ"
-        if 'process_timestamp' in df_filtered.columns and df_filtered['process_timestamp'].notna().any():
-            try: latest_update_time = pd.to_datetime(df_filtered['process_timestamp'].max()).strftime('%H:%M:%S %d/%m/%Y')
-            except: pass
+        latest_update_ts = kpi_values['latest_update']
+        if latest_update_ts is not None:
+            latest_update_time = latest_update_ts.strftime('%H:%M:%S %d/%m/%Y')
         kpi_col1, kpi_col2, kpi_col3 = st.columns(3)
         kpi_col1.metric(label="Tổng số Tin Tuyển Dụng", value=f"{total_jobs_filtered:,}")
-        avg_exp_val = df_filtered['experience_years_min_numeric'].median() if 'experience_years_min_numeric' in df_filtered.columns and df_filtered['experience_years_min_numeric'].notna().any() else "N/A"
+        avg_exp_val = kpi_values['median_experience']
+        if avg_exp_val is None: avg_exp_val = "N/A"
         kpi_col2.metric(label="Kinh nghiệm TB (Median)", value=f"{avg_exp_val} năm" if avg_exp_val != "N/A" else "N/A")
         kpi_col3.metric(label="Dữ liệu cập nhật lúc", value=latest_update_time)
         
         if show_all_data_checkbox: # SỬA Ở ĐÂY
             st.subheader("🔍 Toàn bộ dữ liệu (sau lọc)")
-            st.dataframe(df_filtered.reset_index(drop=True)) # Hiển thị toàn bộ df_filtered
+            show_table(with_raw_columns(dataset.rows(selected_rows), analytics.DATA_CSV_FILENAME, analytics.DATA_STORE_DIR).reset_index(drop=True)) # Hiển thị toàn bộ dòng sau lọc (nạp lười cột thô)
         elif st.sidebar.checkbox("Hiển thị dữ liệu mẫu (10 dòng đầu)", value=False, key="show_sample_data_default"): # Giữ lại lựa chọn cũ nếu muốn
              st.subheader("🔍 Dữ liệu mẫu (10 dòng đầu)")
-             st.dataframe(df_filtered.head(10).reset_index(drop=True))
+             show_table(dataset.rows(selected_rows[:10]).reset_index(drop=True))
     else: st.warning("⚠️ Không có dữ liệu nào khớp với bộ lọc của bạn.")
     st.markdown("---")
 
     # --- Các Tab Phân Tích ---
-    if not df_filtered.empty:
+    if n_filtered:
         st.header("💡 Insights Chi Tiết") 
-        tab1, tab2, tab3, tab4 = st.tabs(["🌍 Địa Điểm & Vai Trò", "🛠️ Kinh Nghiệm & Kỹ Năng", "💰 Lương & Phúc Lợi", "📅 Xu Hướng Thời Gian"])
-        
-        with tab1:
-            # ... (Nội dung tab 1 giữ nguyên)
-            col_loc, col_role = st.columns(2)
-            with col_loc:
-                if 'location_primary' in df_filtered.columns:
-                    location_counts_f = df_filtered['location_primary'].value_counts().head(7)
-                    if not location_counts_f.empty:
-                        fig_loc = px.bar(location_counts_f, x=location_counts_f.index, y=location_counts_f.values, labels={'x':'Địa điểm', 'y':'Số lượng tin'}, title="<b>Top 7 Địa điểm Tuyển dụng</b>", color=location_counts_f.index, color_discrete_sequence=px.colors.qualitative.Pastel1)
-                        fig_loc.update_layout(xaxis_tickangle=-45, title_x=0.5, font=dict(family="Arial, sans-serif")); st.plotly_chart(fig_loc, use_container_width=True)
-            with col_role:
-                if 'job_role_group' in df_filtered.columns:
-                    role_counts_f = df_filtered['job_role_group'].value_counts()
-                    if not role_counts_f.empty:
-                        fig_role = px.pie(role_counts_f, values=role_counts_f.values, names=role_counts_f.index, title="<b>Tỷ lệ theo Vai trò chính</b>", hole=.4, color_discrete_sequence=px.colors.sequential.Agsunset)
-                        fig_role.update_traces(textposition='inside', textinfo='percent+label'); fig_role.update_layout(title_x=0.5, font=dict(family="Arial, sans-serif")); st.plotly_chart(fig_role, use_container_width=True)
-        with tab2:
-            # ... (Nội dung tab 2 giữ nguyên)
-            col_exp_skill1, col_exp_skill2 = st.columns(2)
-            with col_exp_skill1:
-                if 'experience_years_min_numeric' in df_filtered.columns:
-                    if 'experience_group' not in df_filtered.columns or df_filtered['experience_group'].isnull().all() :
-                        def group_experience_st(years):
-                            if pd.isna(years): return "Không rõ"; 
-                            if years == 0: return "0 (Fresher)"; 
-                            if 1 <= years <= 2: return "1-2 năm"; 
-                            if 3 <= years <= 5: return "3-5 năm"; 
-                            if years > 5: return ">5 năm"; return "Khác"
-                        df_filtered.loc[:, 'experience_group'] = df_filtered['experience_years_min_numeric'].apply(group_experience_st)
-                    if 'experience_group' in df_filtered.columns:
-                        exp_group_counts_f = df_filtered['experience_group'].value_counts()
-                        if not exp_group_counts_f.empty:
-                            fig_exp = px.bar(exp_group_counts_f, x=exp_group_counts_f.index, y=exp_group_counts_f.values, labels={'x':'Nhóm kinh nghiệm', 'y':'Số lượng tin'}, title="<b>Số tin theo Nhóm Kinh nghiệm</b>", color=exp_group_counts_f.index, color_discrete_sequence=px.colors.qualitative.Safe)
-                            fig_exp.update_layout(title_x=0.5, font=dict(family="Arial, sans-serif")); st.plotly_chart(fig_exp, use_container_width=True)
-            with col_exp_skill2:
-                if 'parsed_skills_or_tags' in df_filtered.columns:
-                    st.markdown("**Top 10 Kỹ năng/Tags phổ biến**", unsafe_allow_html=True)
-                    all_skills_tags_list_f = []; df_filtered['parsed_skills_or_tags'].dropna().apply(lambda skills_list: all_skills_tags_list_f.extend([skill.lower().strip() for skill in skills_list if skill.strip()]))
-                    if all_skills_tags_list_f:
-                        skill_tag_counts_f = pd.Series(all_skills_tags_list_f).value_counts().head(10)
-                        fig_skill = px.bar(skill_tag_counts_f, y=skill_tag_counts_f.index, x=skill_tag_counts_f.values, orientation='h', labels={'y':'Kỹ năng/Tag', 'x':'Số lần xuất hiện'}, title="<b>Top 10 Kỹ năng/Tags</b>", color=skill_tag_counts_f.values, color_continuous_scale=px.colors.sequential.Tealgrn)
-                        fig_skill.update_layout(yaxis={'categoryorder':'total ascending'}, title_x=0.5, font=dict(family="Arial, sans-serif")); st.plotly_chart(fig_skill, use_container_width=True)
-                    else: st.write("Không có dữ liệu kỹ năng/tags.")
-        with tab3:
-            # ... (Nội dung tab 3 giữ nguyên)
-            if 'salary_min_vnd' in df_filtered.columns and 'salary_negotiable' in df_filtered.columns:
-                df_salary_plot_f = df_filtered[(df_filtered['salary_negotiable'] == False) & (df_filtered['salary_min_vnd'].notna())].copy()
-                if not df_salary_plot_f.empty:
-                    st.write(f"Phân tích trên {len(df_salary_plot_f)} tin có mức lương cụ thể:")
-                    if 'salary_avg_vnd' not in df_salary_plot_f.columns: 
-                        df_salary_plot_f['salary_avg_vnd'] = df_salary_plot_f[['salary_min_vnd', 'salary_max_vnd']].mean(axis=1)
-                        min_only_mask = df_salary_plot_f['salary_avg_vnd'].isna() & df_salary_plot_f['salary_min_vnd'].notna(); df_salary_plot_f.loc[min_only_mask, 'salary_avg_vnd'] = df_salary_plot_f.loc[min_only_mask, 'salary_min_vnd']
-                        max_only_mask = df_salary_plot_f['salary_avg_vnd'].isna() & df_salary_plot_f['salary_max_vnd'].notna(); df_salary_plot_f.loc[max_only_mask, 'salary_avg_vnd'] = df_salary_plot_f.loc[max_only_mask, 'salary_max_vnd']
-                        df_salary_plot_f.dropna(subset=['salary_avg_vnd'], inplace=True)
-                    if not df_salary_plot_f.empty:
-                        fig_salary = px.histogram(df_salary_plot_f, x="salary_min_vnd", nbins=15, title="<b>Phân bổ Lương Tối thiểu (VND/tháng)</b>", labels={'salary_min_vnd':'Lương tối thiểu (VND)'}, opacity=0.8, color_discrete_sequence=['#2ecc71'])
-                        fig_salary.update_layout(bargap=0.1, title_x=0.5, font=dict(family="Arial, sans-serif")); st.plotly_chart(fig_salary, use_container_width=True)
-                        if 'job_role_group' in df_salary_plot_f.columns:
-                            st.write("**Lương tối thiểu trung vị theo Vai trò:**"); st.dataframe(df_salary_plot_f.groupby('job_role_group')['salary_min_vnd'].median().apply(lambda x: f"{x/1000000:,.1f} Tr" if pd.notna(x) else "N/A").sort_values(ascending=False).reset_index().rename(columns={'job_role_group':'Vai trò', 'salary_min_vnd':'Lương trung vị (Min)'}))
-                    else: st.write("Không có đủ dữ liệu lương cụ thể (sau khi tính avg) để vẽ biểu đồ.")
-                else: st.write("Không có đủ dữ liệu lương cụ thể để vẽ biểu đồ.")
-            if 'benefits_text' in df_filtered.columns:
-                st.write("**Phúc lợi thường gặp (Top 10)**")
-                try:
-                    all_benefits = []; df_filtered['benefits_text'].dropna().astype(str).apply(lambda x: all_benefits.extend([b.strip().lower() for b in x.split(';') if b.strip() and b.lower() != 'không có thông tin']))
-                    if all_benefits:
-                        benefit_counts_f = pd.Series(all_benefits).value_counts().head(10)
-                        fig_benefits = px.bar(benefit_counts_f, x=benefit_counts_f.index, y=benefit_counts_f.values, labels={'x':'Phúc lợi', 'y':'Số lần đề cập'}, title="<b>Top 10 Phúc lợi</b>", color=benefit_counts_f.values, color_continuous_scale=px.colors.sequential.Magenta)
-                        fig_benefits.update_layout(xaxis_tickangle=-45, title_x=0.5, font=dict(family="Arial, sans-serif")); st.plotly_chart(fig_benefits, use_container_width=True)
-                    else: st.write("Không có dữ liệu phúc lợi.")
-                except Exception as e_ben: st.write(f"Lỗi khi phân tích phúc lợi: {e_ben}")
-        with tab4:
-            # ... (Nội dung tab 4 giữ nguyên)
-            if 'posted_year_month' in df_filtered.columns:
-                df_filtered_for_trend = df_filtered.copy() 
-                df_filtered_for_trend.loc[:, 'posted_year_month_dt'] = df_filtered_for_trend['posted_year_month'].apply(lambda x: x.to_timestamp() if pd.notna(x) else pd.NaT)
-                monthly_counts_f = df_filtered_for_trend.dropna(subset=['posted_year_month_dt']).set_index('posted_year_month_dt').resample('M')['url'].count().sort_index()
-                if not monthly_counts_f.empty:
-                    fig_trend = px.line(monthly_counts_f, x=monthly_counts_f.index, y=monthly_counts_f.values, markers=True, labels={'x':'Tháng/Năm đăng tin', 'y':'Số lượng tin'}, title='<b>Xu hướng số lượng tin đăng theo Tháng</b>')
-                    fig_trend.update_layout(xaxis_tickangle=-45, title_x=0.5, font=dict(family="Arial, sans-serif")); st.plotly_chart(fig_trend, use_container_width=True)
-                else: st.write("Không đủ dữ liệu ngày tháng để vẽ biểu đồ xu hướng.")
-            else: st.write("Thiếu cột 'posted_year_month' để phân tích xu hướng.")
+        # Chỉ tab đang mở được tính (tabs lười); kết quả dựng được cache theo (dữ liệu, bộ lọc, biểu đồ)
+        tab1, tab2, tab3, tab4 = st.tabs(["🌍 Địa Điểm & Vai Trò", "🛠️ Kinh Nghiệm & Kỹ Năng", "💰 Lương & Phúc Lợi", "📅 Xu Hướng Thời Gian"], key="insight_tab", on_change="rerun")
+        figure_cache = get_figure_cache()
+        figure_cache.drop_versions_except(dataset.version)
+        filter_key = (selected_source, selected_location, selected_role, tuple(selected_exp_range))
+        def cached(chart_id, build, filters=filter_key):
+            return figure_cache.get_or_build(dataset.version, filters, chart_id, build)
+
+        with tab1, instrumentation.span('tab_location_role', rows_in=n_filtered):
+            if tab1.open:
+                col_loc, col_role = st.columns(2)
+                with col_loc:
+                    if 'location_primary' in aggregate_cube.dimensions:
+                        fig_loc = cached('location_bar', lambda: analytics.location_bar(selection))
+                        if fig_loc is not None: show_chart(fig_loc)
+                with col_role:
+                    if 'job_role_group' in aggregate_cube.dimensions:
+                        fig_role = cached('role_pie', lambda: analytics.role_pie(selection))
+                        if fig_role is not None: show_chart(fig_role)
+        with tab2, instrumentation.span('tab_experience_skills', rows_in=n_filtered):
+            if tab2.open:
+                col_exp_skill1, col_exp_skill2 = st.columns(2)
+                with col_exp_skill1:
+                    if 'experience_years_min_numeric' in aggregate_cube.dimensions:
+                        fig_exp = cached('experience_bar', lambda: analytics.experience_bar(selection))
+                        if fig_exp is not None: show_chart(fig_exp)
+                with col_exp_skill2:
+                    skill_matrix = dataset.skill_matrix
+                    if skill_matrix is not None:
+                        st.markdown("**Top 10 Kỹ năng/Tags phổ biến**", unsafe_allow_html=True)
+                        fig_skill = cached('skills_bar', lambda: analytics.skills_bar(selection))
+                        if fig_skill is not None: show_chart(fig_skill)
+                        else: st.write("Không có dữ liệu kỹ năng/tags.")
+                if skill_matrix is not None:
+                    col_cooc, col_assoc = st.columns(2)
+                    with col_cooc:
+                        fig_cooc = cached('cooccurrence_heatmap', lambda: analytics.cooccurrence_heatmap(selection))
+                        if fig_cooc is not None: show_chart(fig_cooc)
+                    with col_assoc:
+                        assoc_dim = st.radio("Kỹ năng đặc trưng theo:", ["Vai trò", "Địa điểm"], horizontal=True, key="assoc_dim")
+                        assoc_col = 'job_role_group' if assoc_dim == "Vai trò" else 'location_primary'
+                        if assoc_col in master_columns:
+                            assoc_options = role_options[1:] if assoc_col == 'job_role_group' else location_options[1:]
+                            current_value = selected_role if assoc_col == 'job_role_group' else selected_location
+                            assoc_value = st.selectbox(f"{assoc_dim}:", assoc_options, index=assoc_options.index(current_value) if current_value in assoc_options else 0)
+                            # Kỹ năng đặc trưng tính trên toàn bộ dữ liệu, không phụ thuộc bộ lọc sidebar
+                            fig_assoc = cached(f'associated_skills_bar:{assoc_col}:{assoc_value}', lambda: analytics.associated_skills_bar(dataset, assoc_col, assoc_value), filters=())
+                            if fig_assoc is not None: show_chart(fig_assoc)
+                            else: st.write("Không đủ dữ liệu để xác định kỹ năng đặc trưng.")
+        with tab3, instrumentation.span('tab_salary_benefits', rows_in=n_filtered):
+            if tab3.open:
+                if 'salary_min_vnd' in master_columns and 'salary_negotiable' in master_columns:
+                    # Histogram và phân vị được tính sẵn ở server; trình duyệt chỉ nhận các cột đã đếm
+                    salary_summary_f, fig_salary = cached('salary_histogram', lambda: analytics.salary_overview(selection))
+                    if salary_summary_f['postings']:
+                        st.write(f"Phân tích trên {salary_summary_f['postings']} tin có mức lương cụ thể:")
+                        st.caption(f"Trung vị: tối thiểu {salary_summary_f['median_min']/1000000:,.1f} Tr · trung bình {salary_summary_f['median_avg']/1000000:,.1f} Tr"
+                                   + (f" · tối đa {salary_summary_f['median_max']/1000000:,.1f} Tr" if salary_summary_f['median_max'] is not None else "")
+                                   + (f" — {salary_summary_f['usd_postings']} tin ghi lương bằng USD (đã quy đổi sang VND)" if salary_summary_f['usd_postings'] else ""))
+                        show_chart(fig_salary)
+                        if 'job_role_group' in aggregate_cube.dimensions:
+                            st.write("**Lương tối thiểu theo Vai trò (P25 / trung vị / P75):**"); show_table(cached('salary_percentile_table', lambda: analytics.salary_percentile_table(selection)))
+                    else: st.write("Không có đủ dữ liệu lương cụ thể để vẽ biểu đồ.")
+                if 'parsed_benefits' in master_columns:
+                    st.write("**Phúc lợi thường gặp (Top 10)**")
+                    try:
+                        fig_benefits = cached('benefits_bar', lambda: analytics.benefits_bar(selection))
+                        if fig_benefits is not None: show_chart(fig_benefits)
+                        else: st.write("Không có dữ liệu phúc lợi.")
+                    except Exception as e_ben: st.write(f"Lỗi khi phân tích phúc lợi: {e_ben}")
+        with tab4, instrumentation.span('tab_trend', rows_in=n_filtered):
+            if tab4.open:
+                if 'posted_year_month' in aggregate_cube.dimensions:
+                    fig_trend = cached('monthly_trend_line', lambda: analytics.monthly_trend_line(selection))
+                    if fig_trend is not None: show_chart(fig_trend)
+                    else: st.write("Không đủ dữ liệu ngày tháng để vẽ biểu đồ xu hướng.")
+                else: st.write("Thiếu cột 'posted_year_month' để phân tích xu hướng.")
 
     # --- Thông báo cuối trang ---
     st.markdown("---"); st.markdown("Dự án được thực hiện bởi Nhóm 6") 
     st.markdown(f"Dữ liệu được tổng hợp từ VietnamWorks và CareerViet, xử lý lần cuối vào: {latest_update_time if 'latest_update_time' in locals() and latest_update_time != 'Không rõ' else 'Chưa có thông tin'}")
 
+# --- Kết thúc đo; panel debug (mở bằng ?debug=1) ---
+finished_trace = instrumentation.end_trace(TRACE_CONFIG)
+if debug_panel_enabled and finished_trace is not None:
+    with st.sidebar.expander("🐞 Debug: thời gian các bước", expanded=True):
+        st.write(f"Tổng thời gian lần chạy: {finished_trace.seconds * 1000:,.0f} ms (lần chạy #{finished_trace.rerun})")
+        st.dataframe(instrumentation.spans_frame(finished_trace), hide_index=True)
+        st.write("Cache biểu đồ:", get_figure_cache().stats())
@@ -0,0 +1,83 @@
+# figure_cache.py
+"""Cache LRU có giới hạn bộ nhớ cho các biểu đồ / bảng đã dựng của dashboard.
+
+Khóa là (phiên bản dữ liệu, bộ lọc, id biểu đồ); giá trị là Figure Plotly, DataFrame
+nhỏ hoặc tuple các giá trị đó (None cũng được cache: "không có dữ liệu để vẽ").
+Cache dùng chung cho mọi phiên nên các giá trị trả ra phải được coi là chỉ đọc.
+Khi tổng dung lượng ước tính vượt max_bytes hoặc số mục vượt max_entries, các mục
+ít được dùng gần đây nhất bị loại.
+"""
+from collections import OrderedDict
+import sys
+import threading
+
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+import plotly.io as pio
+
+
+def estimate_bytes(value):
+    """Ước lượng dung lượng một giá trị trong cache (Figure: kích thước spec JSON)."""
+    if value is None:
+        return 0
+    if isinstance(value, BaseFigure):
+        return len(pio.to_json(value, validate=False))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class FigureCache:
+    """LRU (data_version, filters, chart_id) -> giá trị đã dựng, giới hạn theo số mục và byte."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=512):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._latest_version = None
+        self._entries = OrderedDict()  # key -> (value, bytes)
+        self._lock = threading.Lock()
+
+    def get_or_build(self, data_version, filters, chart_id, build):
+        """Giá trị trong cache, hoặc gọi build() rồi lưu lại."""
+        key = (data_version, filters, chart_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = build()
+        size = estimate_bytes(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def drop_versions_except(self, data_version):
+        """Bỏ mọi mục của các phiên bản dữ liệu cũ (chỉ quét khi phiên bản thay đổi)."""
+        with self._lock:
+            if data_version == self._latest_version:
+                return
+            self._latest_version = data_version
+            for key in [k for k in self._entries if k[0] != data_version]:
+                self.total_bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.total_bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
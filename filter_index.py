@@ -0,0 +1,147 @@
+# filter_index.py
+"""Chỉ mục lọc dựng sẵn cho các bộ lọc ở sidebar.
+
+Mỗi giá trị của nguồn / địa điểm / vai trò có một bitmap (mảng bool nén bằng
+np.packbits); số năm kinh nghiệm được sắp xếp sẵn để lọc khoảng bằng
+searchsorted. Một lần lọc chỉ AND các bitmap với nhau rồi trả về mảng vị trí
+dòng, không tạo DataFrame trung gian. Kết quả được nhớ trong LRU có giới hạn,
+khóa theo bộ giá trị lọc.
+
+Khi nạp thêm batch mới, appended() nối bitmap của các dòng mới vào cuối (không giải
+nén phần cũ) và đánh dấu các dòng bị thay thế là "chết" thay vì dựng lại chỉ mục từ đầu.
+"""
+from collections import OrderedDict
+import threading
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['source_website', 'location_primary', 'job_role_group']
+EXPERIENCE_COLUMN = 'experience_years_min_numeric'
+
+
+def _experience_values(df):
+    return pd.to_numeric(df[EXPERIENCE_COLUMN], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _sorted_experience(exp_values, offset=0):
+    valid_pos = np.flatnonzero(~np.isnan(exp_values))
+    order = valid_pos[np.argsort(exp_values[valid_pos], kind='stable')]
+    return order + offset, exp_values[order]
+
+
+def _append_bits(packed, n_old, new_bits):
+    """Bitmap nén của n_old bit cũ nối thêm new_bits; chỉ byte cuối (dở dang) của phần cũ được giải nén."""
+    full_bytes, tail = divmod(n_old, 8)
+    if tail:
+        new_bits = np.concatenate([np.unpackbits(packed[full_bytes:full_bytes + 1], count=tail).astype(bool), new_bits])
+    return np.concatenate([packed[:full_bytes], np.packbits(new_bits)])
+
+
+def _clear_bits(packed, positions):
+    """Tắt các bit tại positions trong bitmap nén (tại chỗ)."""
+    positions = np.asarray(positions, dtype=np.int64)
+    np.bitwise_and.at(packed, positions >> 3, ~(np.uint8(0x80) >> (positions & 7).astype(np.uint8)))
+
+
+class FilterIndex:
+    """Bitmap theo giá trị cho các cột lọc + chỉ mục sắp xếp cho số năm kinh nghiệm."""
+
+    def __init__(self, df, max_cached_selections=256):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for col in FILTER_COLUMNS:
+            if col in df.columns:
+                self.bitmaps[col] = self._build_bitmaps(df[col])
+        self.exp_order = None
+        if EXPERIENCE_COLUMN in df.columns:
+            self.exp_order, self.exp_sorted = _sorted_experience(_experience_values(df))
+        self.live = None  # None = mọi dòng còn hiệu lực; ngược lại là bitmap các dòng còn sống
+        self.max_cached_selections = max_cached_selections
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _build_bitmaps(self, series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        bitmaps = {}
+        for code, value in enumerate(uniques):
+            bitmaps[value] = np.packbits(codes == code)
+        return bitmaps
+
+    def appended(self, df_new, dead_rows=None):
+        """Chỉ mục mới = chỉ mục hiện tại + các dòng df_new nối vào cuối, bỏ các dòng dead_rows.
+
+        Chỉ mục cũ giữ nguyên (các phiên đang dùng nó không bị ảnh hưởng).
+        """
+        n_old, n_new = self.n_rows, len(df_new)
+        index = FilterIndex.__new__(FilterIndex)
+        index.n_rows = n_old + n_new
+        index.bitmaps = {}
+        empty_old = np.zeros((n_old + 7) // 8, dtype=np.uint8)
+        for col, old_bitmaps in self.bitmaps.items():
+            codes, uniques = pd.factorize(df_new[col], use_na_sentinel=True)
+            new_code = {value: code for code, value in enumerate(uniques)}
+            combined = {}
+            for value in list(old_bitmaps) + [v for v in uniques if v not in old_bitmaps]:
+                new_bits = (codes == new_code[value]) if value in new_code else np.zeros(n_new, dtype=bool)
+                combined[value] = _append_bits(old_bitmaps.get(value, empty_old), n_old, new_bits)
+            index.bitmaps[col] = combined
+        index.exp_order = self.exp_order
+        if self.exp_order is not None:
+            new_order, new_sorted = _sorted_experience(_experience_values(df_new), offset=n_old)
+            insert_at = np.searchsorted(self.exp_sorted, new_sorted, side='right')
+            index.exp_order = np.insert(self.exp_order, insert_at, new_order)
+            index.exp_sorted = np.insert(self.exp_sorted, insert_at, new_sorted)
+        has_dead = dead_rows is not None and len(dead_rows) > 0
+        if self.live is None and not has_dead:
+            index.live = None
+        else:
+            old_live = self.live if self.live is not None else np.packbits(np.ones(n_old, dtype=bool))
+            index.live = _append_bits(old_live, n_old, np.ones(n_new, dtype=bool))
+            if has_dead:
+                _clear_bits(index.live, dead_rows)
+        index.max_cached_selections = self.max_cached_selections
+        index._cache = OrderedDict()
+        index._lock = threading.Lock()
+        return index
+
+    def _experience_bitmap(self, exp_range):
+        lo = np.searchsorted(self.exp_sorted, exp_range[0], side='left')
+        hi = np.searchsorted(self.exp_sorted, exp_range[1], side='right')
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.exp_order[lo:hi]] = True
+        return np.packbits(mask)
+
+    def _compute(self, key):
+        source, location, role, exp_range = key
+        packed = None if self.live is None else self.live.copy()
+        for col, value in zip(FILTER_COLUMNS, (source, location, role)):
+            if value is None or col not in self.bitmaps:
+                continue
+            bitmap = self.bitmaps[col].get(value)
+            if bitmap is None:
+                return np.empty(0, dtype=np.int64)
+            packed = bitmap.copy() if packed is None else np.bitwise_and(packed, bitmap, out=packed)
+        if self.exp_order is not None and exp_range is not None:
+            exp_bitmap = self._experience_bitmap(exp_range)
+            packed = exp_bitmap if packed is None else np.bitwise_and(packed, exp_bitmap, out=packed)
+        if packed is None:
+            return np.arange(self.n_rows, dtype=np.int64)
+        return np.flatnonzero(np.unpackbits(packed, count=self.n_rows)).astype(np.int64)
+
+    def select(self, source=None, location=None, role=None, exp_range=None):
+        """Trả về mảng vị trí dòng (chỉ đọc, tăng dần) khớp bộ lọc. None = không lọc cột đó."""
+        key = (source, location, role, tuple(exp_range) if exp_range is not None else None)
+        with self._lock:
+            rows = self._cache.get(key)
+            if rows is not None:
+                self._cache.move_to_end(key)
+                return rows
+        rows = self._compute(key)
+        rows.flags.writeable = False
+        with self._lock:
+            self._cache[key] = rows
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached_selections:
+                self._cache.popitem(last=False)
+        return rows
@@ -0,0 +1,266 @@
+# ingest.py
+"""Nạp tăng dần các batch dữ liệu mới vào kho phân vùng (partitioned store).
+
+Kho lưu các file Parquet bất biến theo phân vùng:
+    <store>/source_website=<nguồn>/posted_month=<YYYY-MM>/part-<batch>-<n>.parquet
+cùng với:
+    _manifest.json                      danh sách part đang hiệu lực + tombstone + số phiên bản + nhật ký batch
+    _url_index/bucket-<NNN>.parquet     url -> (process_timestamp, part, row) để khử trùng lặp, chia
+                                        URL_INDEX_BUCKETS bucket theo crc32 của url
+
+Mỗi batch (CSV cùng schema với data_cleaned.csv) được ép kiểu/parse như snapshot,
+khử trùng lặp theo url (bản có process_timestamp mới hơn thắng, hòa thì batch sau
+thắng). Batch chỉ đọc và ghi lại các bucket url index chứa url của nó, không phải
+cả index. Dòng cũ bị thay thế không làm ghi lại part chứa nó: vị trí của nó được ghi
+vào manifest['tombstones'][part]. Chỉ khi tỷ lệ dòng chết của một part vượt
+COMPACT_DEAD_FRACTION thì part đó mới được ghi lại (nén). Dashboard so sánh
+manifest cũ/mới để chỉ nạp các part mới và đánh dấu chết các dòng có tombstone mới,
+nên chi phí mỗi lần nạp tỷ lệ với batch chứ không với toàn bộ lịch sử.
+
+Chạy tay: python ingest.py --store store batch1.csv [batch2.csv ...]
+"""
+import os
+import json
+import zlib
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+
+MANIFEST_FILE_NAME = "_manifest.json"
+URL_INDEX_DIR_NAME = "_url_index"
+URL_INDEX_BUCKETS = 256
+LEGACY_URL_INDEX_FILE_NAME = "_url_index.parquet"  # kho schema <= 2: một file index cho cả kho
+STORE_SCHEMA_VERSION = 3
+UNKNOWN_MONTH = "unknown"
+COMPACT_DEAD_FRACTION = 0.5
+
+
+# --- Manifest ---
+def manifest_path(store_dir):
+    return os.path.join(store_dir, MANIFEST_FILE_NAME)
+
+
+def read_store_manifest(store_dir):
+    """Manifest của kho, hoặc None nếu kho chưa được khởi tạo."""
+    try:
+        with open(manifest_path(store_dir), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _empty_manifest():
+    return {'schema_version': STORE_SCHEMA_VERSION, 'version': 0, 'parts': {}, 'tombstones': {}, 'batches': [],
+            'csv_columns': [], 'core_columns': [], 'raw_columns': []}
+
+
+def part_tombstones(manifest):
+    """part -> các vị trí dòng (trong file part) đã bị thay thế; kho cũ chưa có thì rỗng."""
+    return manifest.get('tombstones', {})
+
+
+def store_data_version(manifest):
+    return f"store-v{manifest['version']}"
+
+
+# --- Đọc kho ---
+def read_part(store_dir, part, columns=None):
+    return pd.read_parquet(os.path.join(store_dir, part), columns=columns)
+
+
+def load_parts(store_dir, parts, columns=None):
+    """Đọc các part (theo thứ tự, đủ mọi dòng kể cả dòng có tombstone) và gắn cột _part/_part_row."""
+    frames = []
+    for part in parts:
+        df = read_part(store_dir, part, columns)
+        df['_part'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[part])
+        df['_part_row'] = np.arange(len(df), dtype=np.int64)
+        frames.append(df)
+    return frames
+
+
+def load_raw_columns(store_dir, manifest, df_view):
+    """Đọc lười các cột văn bản thô cho các dòng đang xem, từ đúng các part chứa chúng."""
+    raw_columns = manifest['raw_columns']
+    pieces = []
+    for part, rows in df_view.groupby('_part', observed=True, sort=False):
+        df_raw = read_part(store_dir, part, raw_columns).take(rows['_part_row'].to_numpy())
+        df_raw.index = rows.index
+        pieces.append(df_raw)
+    if not pieces:
+        return pd.DataFrame(index=df_view.index, columns=raw_columns)
+    return pd.concat(pieces).loc[df_view.index]
+
+
+# --- Ghi kho ---
+def _partition_dir(source, month):
+    return f"source_website={quote(str(source), safe='')}/posted_month={month}"
+
+
+def _batch_id(path):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    return f"{stamp}-{snapshot.file_sha256(path)[:8]}"
+
+
+def _write_parquet_atomic(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _index_entries(df_part, part):
+    return pd.DataFrame({'url': df_part['url'].to_numpy(), 'process_timestamp': df_part['process_timestamp'].to_numpy(),
+                         'part': part, 'row': np.arange(len(df_part), dtype=np.int64)})
+
+
+# --- Url index chia bucket ---
+def url_buckets(urls):
+    """Bucket của từng url (crc32: ổn định giữa các tiến trình và phiên bản thư viện)."""
+    return np.fromiter((zlib.crc32(str(url).encode('utf-8')) % URL_INDEX_BUCKETS for url in urls),
+                       dtype=np.int64, count=len(urls))
+
+
+def _bucket_path(store_dir, bucket):
+    return os.path.join(store_dir, URL_INDEX_DIR_NAME, f"bucket-{bucket:03d}.parquet")
+
+
+def _empty_url_index():
+    return pd.DataFrame({'process_timestamp': pd.Series(dtype='datetime64[ns]'), 'part': pd.Series(dtype=object),
+                         'row': pd.Series(dtype='int64')}, index=pd.Index([], name='url', dtype=object))
+
+
+def _read_bucket(store_dir, bucket):
+    path = _bucket_path(store_dir, bucket)
+    return pd.read_parquet(path).set_index('url') if os.path.exists(path) else _empty_url_index()
+
+
+def _write_bucket(store_dir, bucket, entries):
+    _write_parquet_atomic(entries.reset_index(), _bucket_path(store_dir, bucket))
+
+
+def read_url_index(store_dir, buckets=None):
+    """Url index của các bucket cho trước (None = cả kho)."""
+    buckets = range(URL_INDEX_BUCKETS) if buckets is None else buckets
+    frames = [f for f in (_read_bucket(store_dir, b) for b in buckets) if len(f)]
+    return pd.concat(frames) if frames else _empty_url_index()
+
+
+def _migrate_legacy_url_index(store_dir):
+    """Kho schema <= 2: chia file _url_index.parquet thành các bucket (một lần)."""
+    path = os.path.join(store_dir, LEGACY_URL_INDEX_FILE_NAME)
+    if not os.path.exists(path):
+        return
+    url_index = pd.read_parquet(path)
+    if 'row' not in url_index.columns:
+        # Kho schema 1 (chưa có cột row): tìm vị trí dòng của url trong part hiện tại của nó
+        rows = pd.concat([_index_entries(read_part(store_dir, part, ['url', 'process_timestamp']), part)
+                          for part in url_index['part'].unique()], ignore_index=True)
+        url_index = url_index.merge(rows[['url', 'part', 'row']], on=['url', 'part'], how='left')
+    url_index = url_index.set_index('url')
+    for bucket, entries in url_index.groupby(url_buckets(url_index.index)):
+        _write_bucket(store_dir, bucket, entries)
+    os.remove(path)
+
+
+def _update_url_index(store_dir, updates, loaded):
+    """Ghi đè các url trong updates; chỉ các bucket chứa chúng được đọc (nếu chưa có trong loaded) và ghi lại."""
+    for bucket, entries in updates.groupby(url_buckets(updates.index)):
+        current = loaded[bucket] if bucket in loaded else _read_bucket(store_dir, bucket)
+        current = current[~current.index.isin(entries.index)]
+        _write_bucket(store_dir, bucket, pd.concat([current, entries]) if len(current) else entries)
+
+
+def _dedupe_batch(frame):
+    """Trong cùng batch: giữ bản có process_timestamp mới nhất cho mỗi url."""
+    frame = frame[frame['url'].notna()]
+    order = np.argsort(frame['process_timestamp'].fillna(pd.Timestamp.min).to_numpy(), kind='stable')
+    return frame.iloc[order].drop_duplicates('url', keep='last').sort_index()
+
+
+def ingest_batch(store_dir, batch_path):
+    """Nạp một file batch vào kho. Trả về dict thống kê của batch."""
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = read_store_manifest(store_dir) or _empty_manifest()
+    batch_id = _batch_id(batch_path)
+    df_raw = pd.read_parquet(batch_path) if batch_path.endswith('.parquet') else pd.read_csv(batch_path)
+    frame = _dedupe_batch(snapshot.build_frame(df_raw))
+
+    # Last-write-wins theo process_timestamp so với dữ liệu đã có (chỉ đọc các bucket chứa url của batch)
+    _migrate_legacy_url_index(store_dir)
+    loaded = {bucket: _read_bucket(store_dir, bucket) for bucket in np.unique(url_buckets(frame['url']))}
+    url_index = pd.concat([f for f in loaded.values() if len(f)] or [_empty_url_index()])
+    existing = url_index.reindex(frame['url'])
+    incoming_ts = frame['process_timestamp'].fillna(pd.Timestamp.min).to_numpy()
+    existing_ts = existing['process_timestamp'].fillna(pd.Timestamp.min).to_numpy()
+    wins = existing['part'].isna().to_numpy() | (incoming_ts >= existing_ts)
+    frame = frame[wins]
+    superseded = existing[wins & existing['part'].notna().to_numpy()]
+
+    parts = dict(manifest['parts'])
+    tombstones = {part: list(rows) for part, rows in part_tombstones(manifest).items()}
+    removed_parts, part_counter = [], 0
+    index_updates = []
+    # Dòng bị thay thế chỉ được ghi tombstone; part chỉ bị ghi lại khi quá nhiều dòng đã chết
+    for old_part, rows in superseded.groupby('part')['row']:
+        dead = sorted(set(tombstones.get(old_part, [])) | set(rows.astype(np.int64).tolist()))
+        if len(dead) <= COMPACT_DEAD_FRACTION * parts[old_part]:
+            tombstones[old_part] = dead
+            continue
+        df_old = read_part(store_dir, old_part)
+        df_kept = df_old.drop(index=df_old.index[dead]).reset_index(drop=True)
+        removed_parts.append(old_part)
+        del parts[old_part]
+        tombstones.pop(old_part, None)
+        if not df_kept.empty:
+            new_part = f"{os.path.dirname(old_part)}/part-{batch_id}-{part_counter}.parquet"; part_counter += 1
+            _write_parquet_atomic(df_kept, os.path.join(store_dir, new_part))
+            parts[new_part] = len(df_kept)
+            index_updates.append(_index_entries(df_kept, new_part))
+
+    # Ghi các dòng mới theo phân vùng nguồn × tháng đăng
+    months = frame['posted_datetime'].dt.strftime('%Y-%m').fillna(UNKNOWN_MONTH)
+    for (source, month), df_part in frame.groupby([frame['source_website'].astype(object).fillna('unknown'), months], sort=True):
+        new_part = f"{_partition_dir(source, month)}/part-{batch_id}-{part_counter}.parquet"; part_counter += 1
+        _write_parquet_atomic(df_part, os.path.join(store_dir, new_part))
+        parts[new_part] = len(df_part)
+        index_updates.append(_index_entries(df_part, new_part))
+
+    # Cập nhật url index rồi manifest (manifest ghi cuối cùng, nguyên tử)
+    if index_updates:
+        _update_url_index(store_dir, pd.concat(index_updates, ignore_index=True).set_index('url'), loaded)
+    if not manifest['csv_columns']:
+        core = [c for c in snapshot.CORE_COLUMNS if c in frame.columns] + snapshot.DERIVED_COLUMNS
+        manifest.update(csv_columns=df_raw.columns.tolist(), core_columns=core,
+                        raw_columns=[c for c in df_raw.columns if c not in core])
+    stats = {'batch_id': batch_id, 'source_file': os.path.basename(batch_path),
+             'ingested_at': datetime.now(timezone.utc).isoformat(), 'rows_in_file': len(df_raw),
+             'rows_written': len(frame), 'rows_replaced': len(superseded),
+             'parts_added': sorted(set(parts) - set(manifest['parts'])), 'parts_removed': removed_parts}
+    manifest.update(schema_version=STORE_SCHEMA_VERSION, version=manifest['version'] + 1, parts=parts,
+                    tombstones=tombstones, batches=manifest['batches'] + [stats])
+    snapshot.write_json_atomic(manifest_path(store_dir), manifest)
+    for old_part in removed_parts:
+        try: os.remove(os.path.join(store_dir, old_part))
+        except OSError: pass
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nạp batch dữ liệu mới vào kho phân vùng.")
+    parser.add_argument('--store', default='store', help="Thư mục kho (mặc định: store)")
+    parser.add_argument('batches', nargs='+', help="Các file batch CSV/Parquet, nạp theo thứ tự")
+    args = parser.parse_args(argv)
+    for path in args.batches:
+        stats = ingest_batch(args.store, path)
+        print(f"{stats['source_file']}: ghi {stats['rows_written']} dòng, thay thế {stats['rows_replaced']} dòng, "
+              f"{len(stats['parts_added'])} part mới, {len(stats['parts_removed'])} part được nén lại")
+
+
+if __name__ == "__main__":
+    main()
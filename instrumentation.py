@@ -0,0 +1,257 @@
+# instrumentation.py
+"""Đo thời gian / số dòng / bộ nhớ cấp phát theo từng bước (span) của một lần chạy dashboard.
+
+Dùng:
+    with instrumentation.span('sidebar_filter', rows_in=len(df)) as s:
+        ...
+        s.set_rows_out(len(rows))
+
+Span chỉ được ghi khi có một Trace đang hoạt động trong luồng hiện tại (begin_trace).
+Khi không có, span() trả về một đối tượng rỗng dùng chung: chi phí chỉ là một lần đọc
+ContextVar, nên các module thư viện (dataset, snapshot...) có thể gọi span() thoải mái.
+
+Cấu hình qua biến môi trường:
+    DASHBOARD_TRACE_SAMPLE_RATE  tỷ lệ lần chạy được đo (0..1, mặc định 0 = tắt)
+    DASHBOARD_TRACE_LOG          file JSON-lines ghi kết quả (mặc định logs/dashboard_trace.jsonl)
+    DASHBOARD_TRACE_MEMORY       "1" để đo bộ nhớ cấp phát bằng tracemalloc (tốn thêm CPU
+                                 cho mọi luồng khi đang bật; đo chung cả các phiên chạy song song).
+                                 tracemalloc chỉ bật khi có Trace đo bộ nhớ đang chạy và được tắt
+                                 khi Trace cuối cùng kết thúc, nên lần chạy không được đo không tốn thêm.
+"""
+import os
+import json
+import time
+import random
+import logging
+import functools
+import threading
+import tracemalloc
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+DEFAULT_LOG_PATH = os.path.join("logs", "dashboard_trace.jsonl")
+
+_current_trace = ContextVar('dashboard_trace', default=None)
+_logger_lock = threading.Lock()
+_memory_lock = threading.Lock()
+_memory_traces = 0             # số Trace đang đo bộ nhớ (mọi luồng)
+_owns_tracemalloc = False      # tracemalloc do module này bật (không tắt nếu nơi khác đã bật)
+
+
+class TraceConfig:
+    """Cấu hình đo: tỷ lệ lấy mẫu, file log, có đo bộ nhớ hay không."""
+
+    def __init__(self, sample_rate=0.0, log_path=DEFAULT_LOG_PATH, track_memory=False):
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.log_path = log_path
+        self.track_memory = track_memory
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        try:
+            sample_rate = float(environ.get('DASHBOARD_TRACE_SAMPLE_RATE', 0) or 0)
+        except ValueError:
+            sample_rate = 0.0
+        return cls(sample_rate=sample_rate,
+                   log_path=environ.get('DASHBOARD_TRACE_LOG', DEFAULT_LOG_PATH) or None,
+                   track_memory=environ.get('DASHBOARD_TRACE_MEMORY', '') == '1')
+
+
+class _NoSpan:
+    """Span rỗng khi không đo; mọi thao tác đều bỏ qua."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_rows_out(self, rows_out):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """Một bước được đo: thời gian, số dòng vào/ra, bộ nhớ cấp phát ròng và đỉnh."""
+    __slots__ = ('trace', 'name', 'parent', 'depth', 'rows_in', 'rows_out', 'start', 'seconds',
+                 'mem_start', 'alloc_bytes', 'peak_bytes', 'peak_abs')
+
+    def __init__(self, trace, name, rows_in=None):
+        self.trace, self.name, self.rows_in = trace, name, rows_in
+        self.parent = self.depth = None
+        self.rows_out = self.seconds = self.alloc_bytes = self.peak_bytes = None
+
+    def __enter__(self):
+        stack = self.trace._stack
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        if self.trace.track_memory:
+            self.mem_start = tracemalloc.get_traced_memory()[0]
+            self.peak_abs = self.mem_start
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        stack = self.trace._stack
+        stack.pop()
+        if self.trace.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Span con đã reset đỉnh, nên đỉnh của span này gồm cả đỉnh các span con
+            self.peak_abs = max(self.peak_abs, peak)
+            self.alloc_bytes = current - self.mem_start
+            self.peak_bytes = self.peak_abs - self.mem_start
+            if stack:
+                stack[-1].peak_abs = max(stack[-1].peak_abs, self.peak_abs)
+        self.trace.spans.append(self)
+        return False
+
+    def set_rows_out(self, rows_out):
+        self.rows_out = rows_out
+
+    def to_record(self):
+        return {'name': self.name, 'parent': self.parent, 'depth': self.depth, 'seconds': self.seconds,
+                'rows_in': self.rows_in, 'rows_out': self.rows_out,
+                'alloc_bytes': self.alloc_bytes, 'peak_bytes': self.peak_bytes}
+
+
+class Trace:
+    """Các span của một lần chạy (rerun) của một phiên."""
+
+    def __init__(self, session_id=None, rerun=None, sampled=True, track_memory=False):
+        self.session_id, self.rerun, self.sampled = session_id, rerun, sampled
+        self.track_memory = track_memory
+        self._holds_memory_tracing = False
+        self.attributes = {}
+        self.spans = []
+        self._stack = []
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.seconds = None
+
+    def span(self, name, rows_in=None):
+        return Span(self, name, rows_in)
+
+    def annotate(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_record(self):
+        # Span được thêm khi kết thúc; sắp lại theo thứ tự bắt đầu cho dễ đọc
+        spans = sorted(self.spans, key=lambda s: s.start)
+        return {'timestamp': self.started_at.isoformat(), 'session_id': self.session_id, 'rerun': self.rerun,
+                'sampled': self.sampled, 'seconds': self.seconds, 'attributes': self.attributes,
+                'spans': [s.to_record() for s in spans]}
+
+
+# --- API dùng trong app và các module ---
+def span(name, rows_in=None):
+    """Span trong Trace đang hoạt động, hoặc span rỗng nếu không đo."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return trace.span(name, rows_in)
+
+
+def traced(fn):
+    """Decorator: mỗi lần gọi fn là một span mang tên fn (khi đang đo)."""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return fn(*args, **kwargs)
+        with trace.span(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def _acquire_memory_tracing(trace):
+    global _memory_traces, _owns_tracemalloc
+    with _memory_lock:
+        if _memory_traces == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracemalloc = True
+        _memory_traces += 1
+        trace._holds_memory_tracing = True
+
+
+def _release_memory_tracing(trace):
+    """Trả lượt đo bộ nhớ của trace (một lần); tắt tracemalloc khi không còn Trace nào cần."""
+    global _memory_traces, _owns_tracemalloc
+    with _memory_lock:
+        if not trace._holds_memory_tracing:
+            return
+        trace._holds_memory_tracing = False
+        _memory_traces -= 1
+        if _memory_traces == 0 and _owns_tracemalloc:
+            tracemalloc.stop()
+            _owns_tracemalloc = False
+
+
+def begin_trace(config, session_id=None, rerun=None, force=False):
+    """Bắt đầu đo lần chạy hiện tại nếu được lấy mẫu (hoặc force). Trả về Trace hoặc None."""
+    # Lần chạy trước bị ngắt giữa chừng (lỗi, st.stop) thì chưa gọi end_trace: trả lượt đo bộ nhớ của nó
+    previous = _current_trace.get()
+    if previous is not None:
+        _release_memory_tracing(previous)
+    sampled = config.sample_rate > 0 and random.random() < config.sample_rate
+    if not (sampled or force):
+        _current_trace.set(None)
+        return None
+    trace = Trace(session_id, rerun, sampled=sampled, track_memory=config.track_memory)
+    if config.track_memory:
+        _acquire_memory_tracing(trace)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace(config):
+    """Kết thúc Trace đang hoạt động, ghi một dòng JSON vào log (nếu được lấy mẫu). Trả về Trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    _current_trace.set(None)
+    trace.seconds = time.perf_counter() - trace._start
+    _release_memory_tracing(trace)
+    if trace.sampled and config.log_path:
+        _trace_logger(config.log_path).info(json.dumps(trace.to_record(), ensure_ascii=False, default=str))
+    return trace
+
+
+def _trace_logger(log_path):
+    """Logger ghi JSON-lines vào log_path (một handler cho mỗi file, dùng chung giữa các phiên)."""
+    logger = logging.getLogger(f"dashboard.trace.{os.path.abspath(log_path)}")
+    if not logger.handlers:
+        with _logger_lock:
+            if not logger.handlers:
+                os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+                handler = logging.FileHandler(log_path, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+    return logger
+
+
+def spans_frame(trace):
+    """Bảng các span (thụt lề theo độ sâu) để hiển thị trong panel debug."""
+    import pandas as pd
+    rows = []
+    for record in trace.to_record()['spans']:
+        rows.append({'Bước': ' ' * record['depth'] + record['name'],
+                     'ms': round(record['seconds'] * 1000, 1),
+                     'Dòng vào': record['rows_in'], 'Dòng ra': record['rows_out'],
+                     'Cấp phát (KB)': None if record['alloc_bytes'] is None else round(record['alloc_bytes'] / 1024),
+                     'Đỉnh (KB)': None if record['peak_bytes'] is None else round(record['peak_bytes'] / 1024)})
+    return pd.DataFrame(rows)
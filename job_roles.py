@@ -0,0 +1,79 @@
+# job_roles.py
+"""Phân loại nhóm vai trò (job_role_group) từ tiêu đề tin tuyển dụng.
+
+Luật phân loại nằm trong job_role_rules.json: danh sách theo thứ tự ưu tiên,
+mỗi luật gồm tên vai trò và các từ khóa (so khớp chuỗi con, không phân biệt hoa
+thường). Toàn bộ từ khóa được biên dịch thành một regex duy nhất; chỉ các tiêu
+đề khác nhau mới được phân loại, kết quả được gán ngược lại cho từng dòng.
+"""
+import os
+import re
+import json
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_role_rules.json")
+
+
+class JobRoleClassifier:
+    """Bộ phân loại đa từ khóa, giữ nguyên thứ tự ưu tiên của các luật."""
+
+    def __init__(self, rules, default_role='Khác'):
+        self.roles = [rule['role'] for rule in rules]
+        self.default_role = default_role
+        alternatives = []
+        for i, rule in enumerate(rules):
+            keywords = sorted({kw.lower() for kw in rule['keywords']}, key=len, reverse=True)
+            alternatives.append(f"(?P<r{i}>{'|'.join(re.escape(kw) for kw in keywords)})")
+        # Lookahead để bắt mọi vị trí (kể cả từ khóa chồng nhau); tại cùng một vị trí,
+        # nhánh của luật ưu tiên cao hơn được thử trước.
+        self.pattern = re.compile("(?=" + "|".join(alternatives) + ")") if alternatives else None
+
+    def classify_title(self, title):
+        """Phân loại một tiêu đề: luật có thứ tự nhỏ nhất khớp được sẽ thắng."""
+        if self.pattern is None:
+            return self.default_role
+        best = None
+        for match in self.pattern.finditer(str(title).lower()):
+            rule_idx = match.lastindex - 1
+            if best is None or rule_idx < best:
+                best = rule_idx
+                if best == 0: break
+        return self.default_role if best is None else self.roles[best]
+
+    def classify_series(self, titles):
+        """Phân loại cả cột tiêu đề: chỉ xử lý các tiêu đề khác nhau rồi broadcast lại."""
+        codes, uniques = pd.factorize(titles, use_na_sentinel=True)
+        labels = np.array([self.classify_title(t) for t in uniques] + [self.classify_title(np.nan)], dtype=object)
+        values = labels[codes]  # code -1 (NaN) trỏ vào phần tử cuối
+        return pd.Series(pd.Categorical(values, categories=pd.unique(values)), index=titles.index, name='job_role_group')
+
+
+def load_rules(rules_path=DEFAULT_RULES_PATH):
+    with open(rules_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rules_version(rules_path=DEFAULT_RULES_PATH):
+    """Hash ngắn của file luật, dùng kèm phiên bản dữ liệu làm khóa cache."""
+    config = load_rules(rules_path)
+    return hashlib.sha256(json.dumps(config, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+
+@lru_cache(maxsize=8)
+def _compile_classifier(rules_path, version):
+    config = load_rules(rules_path)
+    return JobRoleClassifier(config['rules'], config.get('default_role', 'Khác'))
+
+
+def get_classifier(rules_path=DEFAULT_RULES_PATH):
+    """Bộ phân loại đã biên dịch; tự biên dịch lại khi file luật thay đổi."""
+    return _compile_classifier(rules_path, rules_version(rules_path))
+
+
+def categorize_job_roles(titles, rules_path=DEFAULT_RULES_PATH):
+    """Trả về cột job_role_group (categorical) cho một Series tiêu đề."""
+    return get_classifier(rules_path).classify_series(titles)
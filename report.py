@@ -0,0 +1,236 @@
+# report.py
+"""Dựng báo cáo tĩnh cho mọi phân khúc nguồn × địa điểm × vai trò, không cần mở dashboard.
+
+Mỗi phân khúc có KPI, tóm tắt lương, bảng phân vị lương theo vai trò và mọi biểu đồ
+của các tab (analytics.segment_report), ghi vào <output>/<phân khúc>/:
+    report.html   trang tĩnh (dùng chung <output>/plotly.min.js, không cần mạng)
+    report.json   KPI, bảng và spec Plotly của các biểu đồ
+    <chart>.png   ảnh từng biểu đồ (cần gói kaleido)
+cùng <output>/index.json và <output>/index.html liệt kê các phân khúc.
+Mặc định báo cáo lọc kinh nghiệm giống thanh trượt mặc định của dashboard (toàn bộ
+khoảng có trong dữ liệu, nên bỏ các tin không ghi số năm kinh nghiệm), để số liệu khớp
+với dashboard; --exp-range MIN-MAX chọn khoảng khác, --exp-range all bỏ lọc kinh nghiệm.
+
+Dữ liệu được nạp một lần ở tiến trình chính. Các phân khúc chạy song song trong một
+pool tiến trình khởi tạo bằng fork, nên worker dùng chung Dataset chỉ đọc của tiến
+trình cha (copy-on-write) thay vì đọc lại CSV. Trên nền tảng không có fork, mỗi
+worker tự nạp Dataset một lần từ snapshot.
+
+Chạy tay: python report.py --output reports --formats html json --workers 8 [--exp-range 2-5]
+"""
+import os
+import html
+import json
+import time
+import argparse
+import itertools
+import importlib.util
+import multiprocessing
+import unicodedata
+import re
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from plotly.utils import PlotlyJSONEncoder
+
+import analytics
+import charts
+
+FORMATS = ('html', 'json', 'png')
+DEFAULT_FORMATS = ['html', 'json']
+DEFAULT_OUTPUT_DIR = "reports"
+ALL_LABEL = "Tất cả"
+PLOTLY_JS_FILE_NAME = "plotly.min.js"
+DASHBOARD_EXP_RANGE = "dashboard"  # khoảng kinh nghiệm mặc định của thanh trượt trên dashboard
+ALL_EXP_RANGE = "all"              # không lọc kinh nghiệm (gồm cả tin không ghi số năm)
+
+# Dataset và tùy chọn ghi của worker (kế thừa từ tiến trình cha khi fork)
+_DATASET = None
+_OPTIONS = None
+
+
+# --- Phân khúc ---
+def segments(dataset, include_all=False):
+    """Các bộ lọc (source, location, role); include_all thêm mức "Tất cả" (None) cho mỗi chiều."""
+    levels = []
+    for key in ('source', 'location', 'role'):
+        column = analytics.FILTER_COLUMNS[key]
+        values = dataset.filter_options(column) if column in dataset.columns else []
+        levels.append(([None] if include_all or not values else []) + values)
+    return list(itertools.product(*levels))
+
+
+def segment_slug(source, location, role):
+    """Tên thư mục ASCII của một phân khúc, ví dụ vietnamworks__ho-chi-minh__data-analyst."""
+    parts = []
+    for value in (source, location, role):
+        text = unicodedata.normalize('NFKD', (value or ALL_LABEL).replace('đ', 'd').replace('Đ', 'D'))
+        text = text.encode('ascii', 'ignore').decode('ascii').lower()
+        parts.append(re.sub(r'[^a-z0-9]+', '-', text).strip('-') or 'khac')
+    return '__'.join(parts)
+
+
+def parse_exp_range(text):
+    """'dashboard' | 'all' (-> None) | 'MIN-MAX' (-> (MIN, MAX)), dùng làm type cho argparse."""
+    if text in (DASHBOARD_EXP_RANGE, ALL_EXP_RANGE):
+        return None if text == ALL_EXP_RANGE else text
+    try:
+        lo, hi = (int(v) for v in text.split('-'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"khoảng kinh nghiệm không hợp lệ: {text!r} (ví dụ 2-5, all, dashboard)")
+    if lo > hi:
+        raise argparse.ArgumentTypeError(f"khoảng kinh nghiệm không hợp lệ: {text!r} (MIN > MAX)")
+    return lo, hi
+
+
+def resolve_exp_range(dataset, exp_range):
+    """Khoảng kinh nghiệm thực sự dùng để lọc (None = không lọc)."""
+    return dataset.experience_bounds() if exp_range == DASHBOARD_EXP_RANGE else exp_range
+
+
+# --- Ghi file ---
+def _kpi_lines(report):
+    kpis, summary = report['kpis'], report['salary_summary']
+    latest, exp_range = kpis['latest_update'], report['filters']['exp_range']
+    lines = [f"Số năm kinh nghiệm tối thiểu: {exp_range[0]} - {exp_range[1]}" if exp_range is not None else "Mọi mức kinh nghiệm (kể cả tin không ghi)",
+             f"Tổng số tin tuyển dụng: {kpis['total_jobs']:,}",
+             f"Kinh nghiệm TB (Median): {kpis['median_experience']} năm" if kpis['median_experience'] is not None else "Kinh nghiệm TB (Median): N/A",
+             f"Dữ liệu cập nhật lúc: {latest.strftime('%H:%M:%S %d/%m/%Y') if latest is not None else 'Không rõ'}"]
+    if summary and summary['postings']:
+        lines.append(f"Lương: {summary['postings']} tin có mức lương cụ thể; trung vị tối thiểu {summary['median_min']/1000000:,.1f} Tr"
+                     f", trung bình {summary['median_avg']/1000000:,.1f} Tr")
+    return lines
+
+
+def write_html(report, path, title):
+    figures = [pio.to_html(fig, full_html=False, include_plotlyjs=False) for fig in report['figures'].values()]
+    percentiles = report['salary_percentiles']
+    table = charts.salary_percentile_table(percentiles).to_html(index=False) if percentiles is not None and not percentiles.empty else ""
+    body = "\n".join([f"<h1>{html.escape(title)}</h1>",
+                      "<ul>" + "".join(f"<li>{html.escape(line)}</li>" for line in _kpi_lines(report)) + "</ul>",
+                      table] + [f"<div>{fig}</div>" for fig in figures])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+                f'<script src="../{PLOTLY_JS_FILE_NAME}"></script></head>\n<body>\n{body}\n</body></html>\n')
+
+
+def write_json(report, path):
+    percentiles = report['salary_percentiles']
+    payload = {'filters': report['filters'], 'postings': report['postings'], 'kpis': report['kpis'],
+               'salary_summary': report['salary_summary'],
+               'salary_percentiles': percentiles.reset_index().to_dict('records') if percentiles is not None else None,
+               'figures': {chart_id: fig.to_plotly_json() for chart_id, fig in report['figures'].items()}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, cls=PlotlyJSONEncoder, ensure_ascii=False)
+
+
+def write_png(report, out_dir):
+    paths = []
+    for chart_id, fig in report['figures'].items():
+        paths.append(os.path.join(out_dir, f"{chart_id}.png"))
+        fig.write_image(paths[-1])
+    return paths
+
+
+# --- Worker ---
+def _init_worker(csv_file_name, store_dir, options):
+    """Khởi tạo worker: khi fork, Dataset đã có sẵn từ tiến trình cha; ngược lại nạp một lần."""
+    global _DATASET, _OPTIONS
+    _OPTIONS = options
+    if _DATASET is None:
+        _DATASET = analytics.load_dataset(csv_file_name, store_dir)
+
+
+def render_segment(segment):
+    """Dựng và ghi báo cáo của một phân khúc; trả về một dòng cho index."""
+    start = time.perf_counter()
+    source, location, role = segment
+    slug = segment_slug(source, location, role)
+    out_dir = os.path.join(_OPTIONS['output'], slug)
+    os.makedirs(out_dir, exist_ok=True)
+    report = analytics.segment_report(analytics.Selection(_DATASET, source=source, location=location, role=role,
+                                                          exp_range=_OPTIONS['exp_range']))
+    title = " · ".join(value or ALL_LABEL for value in segment)
+    files = []
+    if 'html' in _OPTIONS['formats']:
+        files.append(os.path.join(out_dir, "report.html"))
+        write_html(report, files[-1], title)
+    if 'json' in _OPTIONS['formats']:
+        files.append(os.path.join(out_dir, "report.json"))
+        write_json(report, files[-1])
+    if 'png' in _OPTIONS['formats']:
+        files += write_png(report, out_dir)
+    return {'slug': slug, 'title': title, 'filters': report['filters'], 'postings': report['postings'],
+            'files': [os.path.relpath(p, _OPTIONS['output']) for p in files],
+            'seconds': round(time.perf_counter() - start, 3), 'pid': os.getpid()}
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else methods[0])
+
+
+def write_index(rows, output_dir, with_html=True):
+    with open(os.path.join(output_dir, "index.json"), 'w', encoding='utf-8') as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    if not with_html:
+        return
+    items = "".join(f'<tr><td><a href="{html.escape(row["slug"])}/report.html">{html.escape(row["title"])}</a></td><td>{row["postings"]:,}</td></tr>'
+                    for row in rows)
+    with open(os.path.join(output_dir, "index.html"), 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Báo cáo phân khúc</title></head>\n<body>\n'
+                f'<h1>Báo cáo phân khúc</h1>\n<table><tr><th>Phân khúc</th><th>Số tin</th></tr>{items}</table>\n</body></html>\n')
+
+
+def generate_reports(csv_file_name, store_dir, output_dir, formats=DEFAULT_FORMATS, workers=None,
+                     include_all=False, min_postings=1, exp_range=DASHBOARD_EXP_RANGE):
+    """Dựng báo cáo cho mọi phân khúc có ít nhất min_postings tin; trả về danh sách dòng index.
+
+    exp_range: DASHBOARD_EXP_RANGE (mặc định của dashboard), (MIN, MAX), hoặc None = không lọc.
+    """
+    global _DATASET
+    workers = workers or os.cpu_count() or 1
+    _DATASET = analytics.load_dataset(csv_file_name, store_dir)
+    exp_range = resolve_exp_range(_DATASET, exp_range)
+    os.makedirs(output_dir, exist_ok=True)
+    if 'html' in formats:
+        with open(os.path.join(output_dir, PLOTLY_JS_FILE_NAME), 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    # Phân khúc rỗng bị bỏ qua ngay ở tiến trình chính (chỉ cần đếm bằng chỉ mục lọc)
+    todo = [s for s in segments(_DATASET, include_all)
+            if len(_DATASET.filter_index.select(source=s[0], location=s[1], role=s[2], exp_range=exp_range)) >= min_postings]
+    init_args = (csv_file_name, store_dir, {'output': output_dir, 'formats': list(formats), 'exp_range': exp_range})
+    if workers == 1:
+        _init_worker(*init_args)
+        rows = [render_segment(s) for s in todo]
+    else:
+        with _pool_context().Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+            rows = pool.map(render_segment, todo, chunksize=max(1, len(todo) // (workers * 4)))
+    write_index(rows, output_dir, with_html='html' in formats)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dựng báo cáo tĩnh (HTML/JSON/PNG) cho mọi phân khúc nguồn × địa điểm × vai trò.")
+    parser.add_argument('--csv', default=analytics.DATA_CSV_FILENAME, help="File CSV dữ liệu đã làm sạch")
+    parser.add_argument('--store', default=analytics.DATA_STORE_DIR, help="Thư mục kho phân vùng (dùng nếu đã có dữ liệu)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help="Thư mục ghi báo cáo")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=DEFAULT_FORMATS, help="Định dạng xuất")
+    parser.add_argument('--workers', type=int, default=None, help="Số tiến trình (mặc định: số CPU; 1 = chạy tuần tự)")
+    parser.add_argument('--include-all', action='store_true', help="Thêm các phân khúc 'Tất cả' cho từng chiều")
+    parser.add_argument('--min-postings', type=int, default=1, help="Bỏ qua phân khúc có ít tin hơn")
+    parser.add_argument('--exp-range', type=parse_exp_range, default=DASHBOARD_EXP_RANGE,
+                        help="Khoảng năm kinh nghiệm tối thiểu MIN-MAX, 'all' (không lọc) hoặc 'dashboard' (mặc định)")
+    args = parser.parse_args(argv)
+    if 'png' in args.formats and importlib.util.find_spec('kaleido') is None:
+        parser.error("Xuất PNG cần gói kaleido: pip install kaleido")
+
+    start = time.perf_counter()
+    rows = generate_reports(args.csv, args.store, args.output, args.formats, args.workers,
+                            args.include_all, args.min_postings, args.exp_range)
+    print(f"Đã dựng {len(rows)} báo cáo phân khúc vào {args.output}/ trong {time.perf_counter() - start:.1f}s "
+          f"({len({row['pid'] for row in rows})} tiến trình)")
+
+
+if __name__ == "__main__":
+    main()
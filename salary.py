@@ -0,0 +1,88 @@
+# salary.py
+"""Phân tích lương: cột lương tính sẵn, histogram và phân vị tính phía server.
+
+Lương tối thiểu / tối đa (VND) đã được quy đổi từ USD khi làm sạch dữ liệu; cột
+salary_currency_original chỉ còn cho biết tin gốc ghi lương bằng đơn vị nào. Tin
+"có lương cụ thể" là tin không thỏa thuận và có lương tối thiểu (giống cube).
+
+Biểu đồ chỉ nhận các cột histogram đã đếm sẵn và vài số tóm tắt, nên dữ liệu gửi
+xuống trình duyệt không phụ thuộc số tin khớp bộ lọc.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+SALARY_MIN_COLUMN = 'salary_min_vnd'
+SALARY_AVG_COLUMN = 'salary_avg_vnd'
+SALARY_MAX_COLUMN = 'salary_max_vnd'
+CURRENCY_COLUMN = 'salary_currency_original'
+# Các cột salary_summary / histogram_bins đọc (để chỉ lấy đúng các cột này cho tập dòng đang lọc)
+INPUT_COLUMNS = [SALARY_MIN_COLUMN, SALARY_AVG_COLUMN, SALARY_MAX_COLUMN, 'salary_negotiable', CURRENCY_COLUMN]
+HISTOGRAM_BINS = 15
+PERCENTILES = (0.25, 0.5, 0.75)
+_NICE_STEPS = (1, 2, 2.5, 5, 10)
+
+
+def _float_values(df, column):
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def add_salary_columns(df):
+    """Thêm salary_avg_vnd: trung bình min/max, hoặc giá trị duy nhất có (một lần, vector hóa)."""
+    if SALARY_MIN_COLUMN not in df.columns or SALARY_MAX_COLUMN not in df.columns:
+        return df
+    salary_min, salary_max = _float_values(df, SALARY_MIN_COLUMN), _float_values(df, SALARY_MAX_COLUMN)
+    df[SALARY_AVG_COLUMN] = np.where(np.isnan(salary_min), salary_max,
+                                     np.where(np.isnan(salary_max), salary_min, (salary_min + salary_max) / 2))
+    return df
+
+
+def specified_mask(df):
+    """Tin có lương cụ thể: không thỏa thuận và có lương tối thiểu."""
+    mask = df[SALARY_MIN_COLUMN].notna().to_numpy(dtype=bool)
+    if 'salary_negotiable' in df.columns:
+        mask &= df['salary_negotiable'].eq(0).to_numpy(dtype=bool, na_value=False)
+    return mask
+
+
+def salary_summary(df):
+    """Số tin có lương cụ thể, số tin ghi lương bằng USD và trung vị min/avg/max (VND)."""
+    mask = specified_mask(df)
+    summary = {'postings': int(mask.sum()), 'usd_postings': 0}
+    if CURRENCY_COLUMN in df.columns:
+        summary['usd_postings'] = int((mask & (df[CURRENCY_COLUMN] == 'usd').to_numpy(dtype=bool, na_value=False)).sum())
+    for key, column in (('median_min', SALARY_MIN_COLUMN), ('median_avg', SALARY_AVG_COLUMN), ('median_max', SALARY_MAX_COLUMN)):
+        values = _float_values(df, column)[mask] if column in df.columns else np.empty(0)
+        values = values[~np.isnan(values)]
+        summary[key] = float(np.median(values)) if len(values) else None
+    return summary
+
+
+def nice_bin_edges(lo, hi, nbins=HISTOGRAM_BINS):
+    """Biên các khoảng đều nhau, độ rộng 'tròn' (1/2/2.5/5 x 10^k), tối đa khoảng nbins+1 khoảng."""
+    raw_width = (hi - lo) / nbins if hi > lo else max(abs(lo), 1.0) / nbins
+    magnitude = 10 ** math.floor(math.log10(raw_width))
+    width = next(step * magnitude for step in _NICE_STEPS if step * magnitude >= raw_width)
+    start = math.floor(lo / width) * width
+    n_bins = int((hi - start) // width) + 1
+    return start + width * np.arange(n_bins + 1)
+
+
+def histogram_bins(df, column=SALARY_MIN_COLUMN, nbins=HISTOGRAM_BINS):
+    """Histogram (bin_start, bin_end, count) của một cột lương trên các tin có lương cụ thể."""
+    values = _float_values(df, column)[specified_mask(df)]
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return pd.DataFrame({'bin_start': [], 'bin_end': [], 'count': []})
+    edges = nice_bin_edges(values.min(), values.max(), nbins)
+    # Khoảng đóng bên trái [a, b) như Plotly
+    codes = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+    counts = np.bincount(codes, minlength=len(edges) - 1)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+
+def role_percentiles(cube, cells, dim='job_role_group', percentiles=PERCENTILES):
+    """Phân vị lương tối thiểu theo vai trò, lấy từ sketch trong cube (không quét dòng)."""
+    quantiles = cube.salary_quantiles_by(dim, cells, list(percentiles))
+    return quantiles.rename(columns=lambda q: f"p{round(q * 100)}").rename_axis(dim)
@@ -0,0 +1,172 @@
+# skill_matrix.py
+"""Ma trận thưa tin tuyển dụng × kỹ năng/tag (CSR).
+
+Skills VietnamWorks và tags CareerViet được chuẩn hóa một lần (Unicode NFC,
+chữ thường, gộp khoảng trắng) thành một bộ từ vựng chung. Mọi thống kê theo
+bộ lọc đều là phép nhân ma trận thưa:
+- top kỹ năng: tổng theo cột trên các dòng được chọn;
+- đồng xuất hiện: B_top.T @ B_top trên các dòng được chọn;
+- kỹ năng đặc trưng theo vai trò/địa điểm: G.T @ B rồi tính lift.
+
+Batch mới được nối vào bằng appended(): từ vựng chỉ mở rộng thêm token mới,
+ma trận cũ giữ nguyên chỉ số cột; các tổng theo cột được cộng/trừ phần thay đổi
+thay vì tính lại trên toàn ma trận.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import instrumentation
+
+
+def normalize_skill(skill):
+    """Chuẩn hóa một kỹ năng/tag: NFC, chữ thường, gộp khoảng trắng."""
+    return ' '.join(unicodedata.normalize('NFC', str(skill)).lower().split())
+
+
+class SkillMatrix:
+    """Bộ từ vựng kỹ năng + ma trận CSR (số lần xuất hiện) theo từng dòng dữ liệu."""
+
+    def __init__(self, skill_lists):
+        self._vocab_index = {}
+        self.matrix = self._encode(skill_lists)
+        self.live = None  # None = mọi dòng còn hiệu lực
+        self._finalize()
+
+    def _encode(self, skill_lists):
+        vocab_index = self._vocab_index
+        indptr = [0]
+        indices = []
+        for skills in skill_lists:
+            if skills is not None:
+                for skill in skills:
+                    token = normalize_skill(skill)
+                    if not token: continue
+                    indices.append(vocab_index.setdefault(token, len(vocab_index)))
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(vocab_index)))
+        matrix.sum_duplicates()
+        return matrix
+
+    def _finalize(self):
+        self.vocabulary = np.array(list(self._vocab_index), dtype=object)
+        self.n_rows = self.matrix.shape[0]
+        self.binary = (self.matrix > 0).astype(np.int32).tocsr()
+        live_weights = np.ones(self.n_rows, dtype=np.int32) if self.live is None else self.live.astype(np.int32)
+        self.n_live_rows = int(live_weights.sum())
+        self.total_counts = self.matrix.T.dot(live_weights)
+        self.postings_per_skill = self.binary.T.dot(live_weights)
+        self._group_cache = {}
+
+    def appended(self, skill_lists_new, dead_rows=None):
+        """Ma trận mới = ma trận hiện tại + các dòng mới nối vào cuối, bỏ các dòng dead_rows.
+
+        Chỉ các dòng mới được mã hóa; các tổng theo cột được cập nhật bằng phần chênh lệch
+        (dòng mới trừ dòng vừa chết), không tính lại trên toàn ma trận.
+        """
+        result = SkillMatrix.__new__(SkillMatrix)
+        result._vocab_index = dict(self._vocab_index)
+        new_rows = result._encode(skill_lists_new)
+        n_vocab = len(result._vocab_index)
+        n_rows = self.n_rows + new_rows.shape[0]
+
+        def stacked(old, new):
+            matrix = sparse.csr_matrix((np.concatenate([old.data, new.data]), np.concatenate([old.indices, new.indices]),
+                                        np.concatenate([old.indptr, new.indptr[1:] + old.nnz])), shape=(n_rows, n_vocab))
+            # Nối theo dòng hai ma trận đã chuẩn hóa vẫn chuẩn hóa: khỏi để scipy kiểm tra lại toàn bộ nnz
+            matrix.has_canonical_format = True
+            return matrix
+        new_binary = (new_rows > 0).astype(np.int32).tocsr()
+        result.matrix = stacked(self.matrix, new_rows)
+        result.binary = stacked(self.binary, new_binary)
+
+        def padded(counts):
+            return np.concatenate([counts, np.zeros(n_vocab - len(counts), dtype=counts.dtype)])
+        total_counts = padded(self.total_counts) + np.asarray(new_rows.sum(axis=0)).ravel()
+        postings = padded(self.postings_per_skill) + np.asarray(new_binary.sum(axis=0)).ravel()
+        live = np.ones(n_rows, dtype=bool)
+        if self.live is not None:
+            live[:self.n_rows] = self.live
+        n_live = self.n_live_rows + new_rows.shape[0]
+        if dead_rows is not None and len(dead_rows):
+            dead_rows = np.asarray(dead_rows, dtype=np.int64)
+            dead_rows = dead_rows[live[dead_rows]]  # bỏ các dòng đã chết từ trước
+            live[dead_rows] = False
+            total_counts = total_counts - np.asarray(result.matrix[dead_rows].sum(axis=0)).ravel()
+            postings = postings - np.asarray(result.binary[dead_rows].sum(axis=0)).ravel()
+            n_live -= len(dead_rows)
+        result.live = None if live.all() else live
+        result.vocabulary = np.array(list(result._vocab_index), dtype=object)
+        result.n_rows, result.n_live_rows = n_rows, n_live
+        result.total_counts, result.postings_per_skill = total_counts, postings
+        result._group_cache = {}
+        return result
+
+    def _row_weights(self, rows):
+        weights = np.zeros(self.n_rows, dtype=np.int32)
+        weights[rows] = 1
+        return weights
+
+    def counts(self, rows=None):
+        """Số lần xuất hiện của từng kỹ năng trên các dòng được chọn (None = toàn bộ)."""
+        if rows is None:
+            return self.total_counts
+        return self.matrix.T.dot(self._row_weights(rows))
+
+    def _top_columns(self, counts, n):
+        # Sắp xếp ổn định: hòa điểm giữ thứ tự xuất hiện đầu tiên trong từ vựng
+        order = np.argsort(-counts, kind='stable')[:n]
+        return order[counts[order] > 0]
+
+    @instrumentation.traced
+    def top_skills(self, rows=None, n=10):
+        """Top n kỹ năng theo số lần xuất hiện; Series (kỹ năng -> số lần)."""
+        counts = self.counts(rows)
+        cols = self._top_columns(counts, n)
+        return pd.Series(counts[cols], index=self.vocabulary[cols], name='count')
+
+    @instrumentation.traced
+    def cooccurrence(self, rows=None, n=10):
+        """Ma trận đồng xuất hiện (số tin có cả hai kỹ năng) của top n kỹ năng."""
+        cols = self._top_columns(self.counts(rows), n)
+        # Chọn dòng trước rồi mới chọn cột, để chi phí theo số dòng được lọc chứ không theo cả ma trận
+        sub = self.binary if rows is None else self.binary[np.asarray(rows)]
+        sub = sub[:, cols]
+        co = (sub.T @ sub).toarray()
+        labels = self.vocabulary[cols]
+        return pd.DataFrame(co, index=labels, columns=labels)
+
+    def _group_counts(self, key, groups):
+        cached = self._group_cache.get(key)
+        if cached is None:
+            codes, uniques = pd.factorize(groups, use_na_sentinel=True)
+            valid = codes >= 0
+            if self.live is not None:
+                valid &= self.live
+            g = sparse.csr_matrix((np.ones(valid.sum(), dtype=np.int32), (np.flatnonzero(valid), codes[valid])),
+                                  shape=(self.n_rows, len(uniques)))
+            cached = (list(uniques), np.asarray(g.sum(axis=0)).ravel(), (g.T @ self.binary).tocsr())
+            self._group_cache[key] = cached
+        return cached
+
+    @instrumentation.traced
+    def associated_skills(self, key, groups, value, n=10, min_postings=3):
+        """Kỹ năng đặc trưng nhất cho một giá trị nhóm (vai trò, địa điểm...), xếp theo lift.
+
+        lift = P(kỹ năng | nhóm) / P(kỹ năng). key dùng để nhớ G.T @ B theo từng cột nhóm.
+        """
+        uniques, group_sizes, group_skill = self._group_counts(key, groups)
+        if value not in uniques:
+            return pd.DataFrame(columns=['skill', 'postings', 'lift'])
+        g = uniques.index(value)
+        in_group = group_skill.getrow(g).toarray().ravel()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = (in_group / group_sizes[g]) / (self.postings_per_skill / self.n_live_rows)
+        candidates = np.flatnonzero(in_group >= min_postings)
+        candidates = candidates[np.argsort(-lift[candidates], kind='stable')][:n]
+        return pd.DataFrame({'skill': self.vocabulary[candidates], 'postings': in_group[candidates],
+                             'lift': lift[candidates]})
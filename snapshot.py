@@ -0,0 +1,186 @@
+# snapshot.py
+"""Snapshot dạng cột (Parquet) cho file CSV dữ liệu đã làm sạch.
+
+Bước build đọc CSV một lần, ép kiểu, parse sẵn JSON skills/tags và phúc lợi,
+chuyển các cột ít giá trị sang categorical rồi ghi ra Parquet. Dashboard chỉ
+đọc các cột cần dùng; các cột văn bản thô chỉ được đọc khi cần bảng toàn bộ
+dữ liệu. Snapshot tự build lại khi CSV thay đổi (mtime/size, xác nhận bằng hash).
+
+Chạy tay: python snapshot.py data_cleaned.csv
+"""
+import os
+import sys
+import json
+import hashlib
+
+import pandas as pd
+
+SNAPSHOT_DIR_NAME = ".snapshot"
+SNAPSHOT_SCHEMA_VERSION = 1
+
+# Các cột gốc dashboard thực sự dùng (đọc mặc định)
+CORE_COLUMNS = ['job_title', 'company_name', 'source_website', 'location_primary',
+                'salary_negotiable', 'salary_min_vnd', 'salary_max_vnd', 'salary_currency_original',
+                'days_to_deadline', 'experience_years_min_numeric', 'job_level', 'employment_type',
+                'process_timestamp', 'views_count']
+# Các cột tính sẵn lúc build
+DERIVED_COLUMNS = ['posted_datetime', 'parsed_skills_or_tags', 'parsed_benefits']
+NUMERIC_COLUMNS = ['salary_min_vnd', 'salary_max_vnd', 'days_to_deadline',
+                   'experience_years_min_numeric', 'views_count']
+CATEGORICAL_COLUMNS = ['source_website', 'location_primary', 'salary_currency_original',
+                       'job_level', 'employment_type']
+NO_BENEFIT_TEXT = 'không có thông tin'
+
+
+def parse_json_list_safe(json_string):
+    """Parse chuỗi JSON thành list chuỗi; trả về [] nếu rỗng/lỗi."""
+    if pd.isna(json_string) or not isinstance(json_string, str): return []
+    try:
+        if json_string.strip() == '[]': return []
+        data = json.loads(json_string)
+        return [str(item) for item in data] if isinstance(data, list) else []
+    except json.JSONDecodeError: return []
+
+
+def split_benefits(benefits_text):
+    """Tách chuỗi phúc lợi (phân cách ';') thành list đã chuẩn hóa chữ thường."""
+    if pd.isna(benefits_text): return []
+    return [b.strip().lower() for b in str(benefits_text).split(';') if b.strip() and b.lower() != NO_BENEFIT_TEXT]
+
+
+def parse_skills_or_tags(df):
+    """Gộp skills VietnamWorks và tags CareerViet thành một cột list."""
+    parsed = pd.Series([[] for _ in range(len(df))], index=df.index, dtype=object)
+    if 'source_website' not in df.columns:
+        return parsed
+    if 'skills_list_json_vnw' in df.columns:
+        mask_vnw = df['source_website'] == 'VietnamWorks'
+        parsed[mask_vnw] = df.loc[mask_vnw, 'skills_list_json_vnw'].map(parse_json_list_safe)
+    if 'job_tags_list_json_cv' in df.columns:
+        mask_cv = (df['source_website'] == 'CareerViet') & (parsed.map(len) == 0)
+        parsed[mask_cv] = df.loc[mask_cv, 'job_tags_list_json_cv'].map(parse_json_list_safe)
+    return parsed
+
+
+def build_frame(df_raw):
+    """Ép kiểu và tính các cột dẫn xuất từ DataFrame đọc thẳng từ CSV."""
+    df = df_raw.copy()
+    if 'posted_datetime_str' in df.columns:
+        df['posted_datetime'] = pd.to_datetime(df['posted_datetime_str'], errors='coerce')
+    else:
+        df['posted_datetime'] = pd.NaT
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+    if 'process_timestamp' in df.columns:
+        df['process_timestamp'] = pd.to_datetime(df['process_timestamp'], errors='coerce')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            # Giữ thứ tự category theo lần xuất hiện đầu tiên để value_counts hòa điểm như cột object
+            df[col] = pd.Categorical(df[col], categories=pd.unique(df[col].dropna()))
+    df['parsed_skills_or_tags'] = parse_skills_or_tags(df)
+    df['parsed_benefits'] = df['benefits_text'].map(split_benefits) if 'benefits_text' in df.columns else [[] for _ in range(len(df))]
+    return df.reset_index(drop=True)
+
+
+# --- Quản lý file snapshot ---
+def snapshot_paths(csv_file_name):
+    """Trả về (đường dẫn parquet, đường dẫn manifest) ứng với file CSV."""
+    csv_dir = os.path.dirname(os.path.abspath(csv_file_name))
+    base = os.path.splitext(os.path.basename(csv_file_name))[0]
+    snap_dir = os.path.join(csv_dir, SNAPSHOT_DIR_NAME)
+    return os.path.join(snap_dir, base + ".parquet"), os.path.join(snap_dir, base + ".manifest.json")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_snapshot(csv_file_name, csv_hash=None):
+    """Đọc CSV và ghi snapshot Parquet + manifest. Trả về manifest."""
+    parquet_path, manifest_path = snapshot_paths(csv_file_name)
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    stat = os.stat(csv_file_name)
+    csv_hash = csv_hash or file_sha256(csv_file_name)
+    df_raw = pd.read_csv(csv_file_name)
+    df = build_frame(df_raw)
+    tmp_path = parquet_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    core = [c for c in CORE_COLUMNS if c in df.columns] + DERIVED_COLUMNS
+    manifest = {
+        'schema_version': SNAPSHOT_SCHEMA_VERSION,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'csv_size': stat.st_size,
+        'csv_sha256': csv_hash,
+        'rows': len(df),
+        'csv_columns': df_raw.columns.tolist(),
+        'core_columns': core,
+        'raw_columns': [c for c in df_raw.columns if c not in core],
+    }
+    write_json_atomic(manifest_path, manifest)
+    return manifest
+
+
+def ensure_snapshot(csv_file_name):
+    """Đảm bảo snapshot còn khớp với CSV, build lại nếu cần. Trả về manifest.
+
+    mtime/size không đổi -> dùng luôn; đổi -> so hash, chỉ build lại khi nội dung khác.
+    """
+    parquet_path, manifest_path = snapshot_paths(csv_file_name)
+    stat = os.stat(csv_file_name)  # FileNotFoundError nếu CSV không tồn tại
+    manifest = _read_manifest(manifest_path)
+    if manifest is None or manifest.get('schema_version') != SNAPSHOT_SCHEMA_VERSION or not os.path.exists(parquet_path):
+        return build_snapshot(csv_file_name)
+    if manifest['csv_mtime_ns'] == stat.st_mtime_ns and manifest['csv_size'] == stat.st_size:
+        return manifest
+    csv_hash = file_sha256(csv_file_name)
+    if csv_hash != manifest['csv_sha256']:
+        return build_snapshot(csv_file_name, csv_hash)
+    manifest.update(csv_mtime_ns=stat.st_mtime_ns, csv_size=stat.st_size)
+    write_json_atomic(manifest_path, manifest)
+    return manifest
+
+
+def data_version(manifest):
+    """Chuỗi định danh phiên bản dữ liệu (dùng làm khóa cache)."""
+    return f"{manifest['csv_sha256'][:16]}-v{manifest['schema_version']}"
+
+
+def load_core(csv_file_name, manifest=None):
+    """Đọc các cột dashboard cần từ snapshot (projection, không đọc cột văn bản thô)."""
+    manifest = manifest or ensure_snapshot(csv_file_name)
+    parquet_path, _ = snapshot_paths(csv_file_name)
+    return pd.read_parquet(parquet_path, columns=manifest['core_columns'])
+
+
+def load_raw_columns(csv_file_name, manifest=None, columns=None):
+    """Đọc (lười) các cột văn bản thô, chỉ dùng khi hiển thị bảng toàn bộ dữ liệu."""
+    manifest = manifest or ensure_snapshot(csv_file_name)
+    parquet_path, _ = snapshot_paths(csv_file_name)
+    return pd.read_parquet(parquet_path, columns=columns or manifest['raw_columns'])
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "data_cleaned.csv"
+    m = build_snapshot(csv_path)
+    print(f"Đã build snapshot {snapshot_paths(csv_path)[0]} ({m['rows']} dòng, version {data_version(m)})")
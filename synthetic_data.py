@@ -0,0 +1,160 @@
+# synthetic_data.py
+"""Sinh dữ liệu tin tuyển dụng giả lập, cùng schema với data_cleaned.csv, ở quy mô lớn.
+
+Mỗi dòng được lấy mẫu (có hoàn lại) từ một dòng thật của file gốc để giữ phân phối
+đồng thời của nguồn / địa điểm / cấp bậc / lương thỏa thuận..., rồi được biến đổi:
+- url duy nhất; tiêu đề thêm tiền tố/hậu tố tiếng Việt và mã tin (nhiều tiêu đề khác nhau
+  như dữ liệu thật khi số tin tăng);
+- tên công ty trộn thêm các công ty giả lập (số công ty tăng theo số dòng);
+- lương nhân hệ số log-normal, làm tròn 500 nghìn; ngày đăng trải trên ~18 tháng;
+- skills/tags và phúc lợi được ghép lại từ từ vựng của file gốc theo tần suất và độ dài thật.
+
+File được ghi theo từng khối nên bộ nhớ không phụ thuộc số dòng.
+
+Chạy tay: python synthetic_data.py 100k synthetic_100k.csv
+"""
+import sys
+import json
+import argparse
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+
+SEED_CSV = "data_cleaned.csv"
+CHUNK_ROWS = 200_000
+LIST_POOL_SIZE = 20_000
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+TITLE_PREFIXES = ["", "", "", "", "Senior ", "Junior ", "Chuyên viên ", "Trưởng nhóm ", "Thực tập sinh ", "[Hà Nội] ", "[HCM] ", "Urgent - "]
+TITLE_SUFFIXES = ["", "", "", "", " (Lương hấp dẫn)", " - Làm việc tại Hà Nội", " - Hồ Chí Minh", " (Tiếng Anh)",
+                  " - Ngân hàng", " - Fintech", " (Remote)", " - Khối Khách hàng Doanh nghiệp"]
+COMPANY_PREFIXES = ["Công ty TNHH", "Công ty Cổ phần", "Ngân hàng TMCP", "Tập đoàn", "Công ty Tài chính"]
+POSTED_SPAN_DAYS = 540
+SALARY_STEP_VND = 500_000
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1M' -> 1000000, '2500' -> 2500."""
+    text = str(text).strip().lower()
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _vocabulary(lists):
+    counts = Counter(item for items in lists for item in items)
+    vocab = np.array(list(counts), dtype=object)
+    weights = np.array(list(counts.values()), dtype='float64')
+    lengths = np.array([len(items) for items in lists if items] or [1])
+    return vocab, weights / weights.sum(), lengths
+
+
+def _list_pool(rng, vocab, weights, lengths, n_pool, encode):
+    """n_pool chuỗi (JSON / phân cách ';') ghép từ vocab theo tần suất và phân phối độ dài thật."""
+    if len(vocab) == 0:
+        return np.array([encode([])] * n_pool, dtype=object)
+    pool = np.empty(n_pool, dtype=object)
+    for i, length in enumerate(rng.choice(lengths, size=n_pool)):
+        pool[i] = encode(rng.choice(vocab, size=min(length, len(vocab)), replace=False, p=weights).tolist())
+    return pool
+
+
+class SeedProfile:
+    """Dòng mẫu và các phân phối lấy từ file gốc."""
+
+    def __init__(self, seed_csv=SEED_CSV, random_seed=0):
+        self.df = pd.read_csv(seed_csv)
+        rng = np.random.default_rng(random_seed)
+        encode_json = lambda items: json.dumps(items, ensure_ascii=False)
+        self.pools = {}
+        for col in ('skills_list_json_vnw', 'job_tags_list_json_cv'):
+            if col in self.df.columns:
+                vocab, weights, lengths = _vocabulary(self.df[col].map(snapshot.parse_json_list_safe))
+                self.pools[col] = _list_pool(rng, vocab, weights, lengths, LIST_POOL_SIZE, encode_json)
+        if 'benefits_text' in self.df.columns:
+            # Bỏ chuỗi "không có thông tin" khỏi từ vựng; các dòng chỉ có chuỗi này được giữ nguyên
+            items = self.df['benefits_text'].map(lambda t: [b.strip() for b in str(t).split(';') if b.strip() and b.strip().lower() != snapshot.NO_BENEFIT_TEXT] if pd.notna(t) else [])
+            vocab, weights, lengths = _vocabulary(items)
+            self.pools['benefits_text'] = _list_pool(rng, vocab, weights, lengths, LIST_POOL_SIZE, '; '.join)
+        posted = pd.to_datetime(self.df['posted_datetime_str'], errors='coerce') if 'posted_datetime_str' in self.df.columns else None
+        self.posted = posted
+        self.latest_posted = posted.max() if posted is not None and posted.notna().any() else pd.Timestamp('2025-05-01')
+
+
+def generate_chunk(profile, rng, start, n_rows, total_rows):
+    """n_rows dòng giả lập, đánh số từ start (dùng cho url)."""
+    seed_pos = rng.integers(0, len(profile.df), n_rows)
+    df = profile.df.iloc[seed_pos].reset_index(drop=True)
+    row_ids = pd.Series(np.arange(start, start + n_rows)).astype(str)
+
+    if 'url' in df.columns:
+        df['url'] = 'https://synthetic.invalid/' + df['source_website'].astype(str).str.lower() + '/job-' + row_ids
+    if 'job_title' in df.columns:
+        prefixes = np.array(TITLE_PREFIXES, dtype=object)[rng.integers(0, len(TITLE_PREFIXES), n_rows)]
+        suffixes = np.array(TITLE_SUFFIXES, dtype=object)[rng.integers(0, len(TITLE_SUFFIXES), n_rows)]
+        codes = pd.Series(rng.integers(0, max(total_rows // 20, 1), n_rows)).astype(str)
+        with_code = rng.random(n_rows) < 0.3
+        df['job_title'] = prefixes + df['job_title'].astype(str) + suffixes
+        df.loc[with_code, 'job_title'] = df.loc[with_code, 'job_title'] + ' (Mã ' + codes[with_code] + ')'
+    if 'company_name' in df.columns:
+        synthetic = rng.random(n_rows) < 0.5
+        company_ids = pd.Series(rng.integers(0, max(total_rows // 20, 1), n_rows)).astype(str)
+        company_prefixes = pd.Series(np.array(COMPANY_PREFIXES, dtype=object)[rng.integers(0, len(COMPANY_PREFIXES), n_rows)])
+        df.loc[synthetic, 'company_name'] = company_prefixes[synthetic] + ' Giả Lập ' + company_ids[synthetic]
+
+    # Lương: nhân hệ số log-normal chung cho min/max, làm tròn theo bước 500 nghìn
+    factor = np.exp(rng.normal(0.0, 0.25, n_rows))
+    for col in ('salary_min_vnd', 'salary_max_vnd'):
+        if col in df.columns:
+            df[col] = np.round(df[col].to_numpy(dtype='float64') * factor / SALARY_STEP_VND) * SALARY_STEP_VND
+    if 'experience_years_min_numeric' in df.columns:
+        exp = df['experience_years_min_numeric'].to_numpy(dtype='float64')
+        jitter = rng.choice([-1.0, 0.0, 0.0, 0.0, 1.0], size=n_rows)
+        df['experience_years_min_numeric'] = np.clip(exp + jitter, 0, None)
+    if 'views_count' in df.columns:
+        df['views_count'] = np.round(df['views_count'].to_numpy(dtype='float64') * rng.uniform(0.2, 3.0, n_rows))
+
+    # Ngày đăng trải đều trên POSTED_SPAN_DAYS ngày; dòng có ngày lỗi giữ nguyên chuỗi gốc
+    if profile.posted is not None:
+        posted = profile.posted.iloc[seed_pos].reset_index(drop=True)
+        offsets = pd.to_timedelta(rng.integers(0, POSTED_SPAN_DAYS, n_rows), unit='D')
+        new_posted = profile.latest_posted.normalize() - offsets
+        valid = posted.notna().to_numpy()
+        df.loc[valid, 'posted_datetime_str'] = new_posted[valid].strftime('%Y-%m-%d %H:%M:%S')
+        if 'process_timestamp' in df.columns:
+            processed = new_posted + pd.to_timedelta(rng.integers(1, 30 * 86400, n_rows), unit='s')
+            df.loc[valid, 'process_timestamp'] = processed[valid].strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+    for col, pool in profile.pools.items():
+        present = df[col].notna().to_numpy()
+        if col == 'benefits_text':
+            present &= (df[col].astype(str).str.strip().str.lower() != snapshot.NO_BENEFIT_TEXT).to_numpy()
+        df.loc[present, col] = pool[rng.integers(0, len(pool), int(present.sum()))]
+    return df
+
+
+def write_synthetic_csv(path, n_rows, seed_csv=SEED_CSV, random_seed=0, chunk_rows=CHUNK_ROWS):
+    """Ghi file CSV n_rows dòng giả lập (theo từng khối). Cùng random_seed -> cùng dữ liệu."""
+    profile = SeedProfile(seed_csv, random_seed)
+    rng = np.random.default_rng(random_seed + 1)
+    for start in range(0, n_rows, chunk_rows):
+        chunk = generate_chunk(profile, rng, start, min(chunk_rows, n_rows - start), n_rows)
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu tin tuyển dụng giả lập cùng schema với data_cleaned.csv.")
+    parser.add_argument('size', help="Số dòng, ví dụ 10k, 1M, 2500")
+    parser.add_argument('output', help="File CSV đầu ra")
+    parser.add_argument('--seed-csv', default=SEED_CSV, help=f"File dữ liệu gốc để lấy mẫu (mặc định: {SEED_CSV})")
+    parser.add_argument('--random-seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_synthetic_csv(args.output, parse_size(args.size), args.seed_csv, args.random_seed)
+    print(f"Đã ghi {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
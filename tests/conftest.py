@@ -0,0 +1,11 @@
+# tests/conftest.py
+"""Cho phép import các module ở thư mục gốc repo (dataset, job_roles, ...) khi chạy pytest,
+và dùng chung đường dẫn tới dữ liệu mẫu data_cleaned.csv."""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+DATA_CSV = os.path.join(REPO_ROOT, "data_cleaned.csv")
@@ -0,0 +1,17 @@
+# tests/test_analytics.py
+"""Nguồn dữ liệu dùng chung của analytics phải nhận ra kho phân vùng được khởi tạo sau khi app đã chạy."""
+import analytics
+import ingest
+from conftest import DATA_CSV
+
+
+def test_load_dataset_switches_to_store_initialised_later(tmp_path):
+    store = str(tmp_path / "store")
+    before = analytics.load_dataset(DATA_CSV, store)
+    assert not before.version.startswith('store-')
+    assert analytics.load_dataset(DATA_CSV, store) is before  # chưa có kho: vẫn dùng snapshot CSV
+
+    ingest.ingest_batch(store, DATA_CSV)
+    after = analytics.load_dataset(DATA_CSV, store)
+    assert after.version.startswith(ingest.store_data_version(ingest.read_store_manifest(store)))
+    assert len(after) == len(before)
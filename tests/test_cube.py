@@ -0,0 +1,84 @@
+# tests/test_cube.py
+"""AggregateCube phải trả lời KPI / group-by giống tính trực tiếp bằng pandas trên các dòng được lọc,
+kể cả sau khi gộp (combined) và trừ các dòng bị thay thế; phân vị từ sketch sai số trong giới hạn."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset as ds
+from cube import AggregateCube, SKETCH_RELATIVE_ACCURACY, sketch_buckets, sketch_quantile
+from conftest import DATA_CSV
+
+QUANTILE_RTOL = 2 * SKETCH_RELATIVE_ACCURACY  # nội suy giữa hai bucket: cộng sai số của hai giá trị
+FILTERS = [(None, None, None, None), ('VietnamWorks', None, None, None), (None, 'Hồ Chí Minh', None, (0, 3)),
+           (None, None, 'Data Analyst', None), ('CareerViet', 'Hà Nội', None, (2, 5))]
+
+
+@pytest.fixture(scope="module")
+def df():
+    return ds.CsvSnapshotSource(DATA_CSV).current().df
+
+
+def _filtered(df, source, location, role, exp_range):
+    mask = pd.Series(True, index=df.index)
+    for col, value in zip(['source_website', 'location_primary', 'job_role_group'], (source, location, role)):
+        if value is not None:
+            mask &= df[col] == value
+    if exp_range is not None:
+        mask &= df['experience_years_min_numeric'].between(*exp_range)
+    return df[mask]
+
+
+def _salary_medians(df_filtered, dim):
+    has_salary = df_filtered[(df_filtered['salary_negotiable'] == False) & df_filtered['salary_min_vnd'].notna()]
+    return has_salary.groupby(dim, observed=True)['salary_min_vnd'].median()
+
+
+def assert_cube_matches(cube, df):
+    for filters in FILTERS:
+        cells, df_filtered = cube.select_cells(*filters), _filtered(df, *filters)
+        assert cube.total(cells) == len(df_filtered)
+        for dim in ['source_website', 'location_primary', 'job_role_group', 'experience_years_min_numeric']:
+            expected = df_filtered[dim].value_counts()
+            assert cube.rollup(dim, cells).to_dict() == expected[expected > 0].to_dict()
+        if len(df_filtered):
+            assert cube.latest_update(cells) == df_filtered['process_timestamp'].max()
+            assert cube.median_experience(cells) == df_filtered['experience_years_min_numeric'].median()
+        expected_medians = _salary_medians(df_filtered, 'job_role_group')
+        medians = cube.salary_quantile_by('job_role_group', cells, 0.5)
+        assert sorted(medians.index) == sorted(expected_medians.index)
+        np.testing.assert_allclose(medians[expected_medians.index], expected_medians, rtol=QUANTILE_RTOL)
+
+
+def test_rollups_and_quantiles_match_groupby(df):
+    assert_cube_matches(AggregateCube(df), df)
+
+
+def test_combined_matches_cube_of_all_rows(df):
+    cut_1, cut_2 = len(df) // 3, len(df) * 2 // 3
+    cube = AggregateCube(df.iloc[:cut_1]).combined(AggregateCube(df.iloc[cut_1:cut_2])).combined(AggregateCube(df.iloc[cut_2:]))
+    assert_cube_matches(cube, df)
+
+
+def test_combined_subtracts_removed_rows(df):
+    removed = np.random.default_rng(0).choice(len(df), len(df) // 5, replace=False)
+    cube = AggregateCube(df).combined(AggregateCube(df.iloc[removed]), sign=-1)
+    live = df.drop(index=removed)
+    for filters in FILTERS:
+        cells, df_filtered = cube.select_cells(*filters), _filtered(live, *filters)
+        assert cube.total(cells) == len(df_filtered)
+        expected = df_filtered['job_role_group'].value_counts()
+        assert cube.rollup('job_role_group', cells).to_dict() == expected[expected > 0].to_dict()
+        expected_medians = _salary_medians(df_filtered, 'location_primary')
+        medians = cube.salary_quantile_by('location_primary', cells, 0.5)
+        np.testing.assert_allclose(medians[expected_medians.index], expected_medians, rtol=QUANTILE_RTOL)
+
+
+@pytest.mark.parametrize("q", [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1])
+def test_sketch_quantile_matches_series_quantile(q):
+    values = np.round(np.random.default_rng(1).lognormal(17, 0.6, 500), -5)  # lương tròn trăm nghìn
+    buckets = sketch_buckets(values)
+    ids, inverse = np.unique(buckets, return_inverse=True)
+    counts, sums = np.bincount(inverse), np.bincount(inverse, weights=values)
+    expected = pd.Series(values).quantile(q)
+    assert sketch_quantile(ids, counts, sums, q) == pytest.approx(expected, rel=QUANTILE_RTOL)
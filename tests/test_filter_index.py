@@ -0,0 +1,80 @@
+# tests/test_filter_index.py
+"""FilterIndex phải chọn đúng các dòng như bộ lọc pandas nối tiếp của end-user.py bản cũ,
+kể cả sau khi nối batch mới (appended) và với các thao tác bit trên bitmap nén."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset as ds
+from filter_index import FilterIndex, _append_bits, _clear_bits
+from conftest import DATA_CSV
+
+
+@pytest.fixture(scope="module")
+def df():
+    return ds.CsvSnapshotSource(DATA_CSV).current().df
+
+
+def chained_filter(df, source=None, location=None, role=None, exp_range=None):
+    """Bộ lọc của end-user.py trước khi có chỉ mục: so sánh từng cột rồi lọc nối tiếp."""
+    df_filtered = df
+    if source is not None: df_filtered = df_filtered[df_filtered['source_website'] == source]
+    if location is not None: df_filtered = df_filtered[df_filtered['location_primary'] == location]
+    if role is not None: df_filtered = df_filtered[df_filtered['job_role_group'] == role]
+    if exp_range is not None:
+        exp = df_filtered['experience_years_min_numeric']
+        df_filtered = df_filtered[(exp >= exp_range[0]) & (exp <= exp_range[1])]
+    return df_filtered.index.to_numpy()
+
+
+def _combinations(df):
+    exp = df['experience_years_min_numeric']
+    lo, hi = int(exp.min()), int(exp.max())
+    return [(source, location, role, exp_range)
+            for source in [None] + df['source_website'].dropna().unique().tolist()
+            for location in [None, 'Không tồn tại'] + df['location_primary'].value_counts().index[:3].tolist()
+            for role in [None] + df['job_role_group'].value_counts().index[:3].tolist()
+            for exp_range in [None, (lo, hi), (1, 2), (3, 3)]]
+
+
+def test_select_matches_chained_filter(df):
+    index = FilterIndex(df)
+    for source, location, role, exp_range in _combinations(df):
+        expected = chained_filter(df, source, location, role, exp_range)
+        np.testing.assert_array_equal(index.select(source, location, role, exp_range), expected)
+
+
+def test_appended_matches_chained_filter_on_live_rows(df):
+    rng = np.random.default_rng(0)
+    cut_1, cut_2 = len(df) // 2, len(df) * 3 // 4
+    dead_1 = rng.choice(cut_2, 40, replace=False)                     # cả dòng cũ lẫn dòng của batch 1
+    dead_2 = np.concatenate([dead_1[:5], rng.choice(len(df), 40, replace=False)])  # có dòng đã chết từ trước
+    index = FilterIndex(df.iloc[:cut_1]).appended(df.iloc[cut_1:cut_2], dead_1).appended(df.iloc[cut_2:], dead_2)
+    live = df.drop(index=np.union1d(dead_1, dead_2))
+    for source, location, role, exp_range in _combinations(df):
+        expected = chained_filter(live, source, location, role, exp_range)
+        np.testing.assert_array_equal(index.select(source, location, role, exp_range), expected)
+
+
+@pytest.mark.parametrize("n_old", list(range(0, 18)) + [64, 101])
+@pytest.mark.parametrize("n_new", [0, 1, 5, 13])
+def test_append_bits_matches_packing_all_bits(n_old, n_new):
+    rng = np.random.default_rng(n_old * 100 + n_new)
+    old_bits, new_bits = rng.random(n_old) < 0.5, rng.random(n_new) < 0.5
+    packed = np.packbits(old_bits)
+    result = _append_bits(packed, n_old, new_bits)
+    np.testing.assert_array_equal(result, np.packbits(np.concatenate([old_bits, new_bits])))
+    np.testing.assert_array_equal(packed, np.packbits(old_bits))  # bitmap cũ không bị sửa
+
+
+@pytest.mark.parametrize("n_bits", [1, 8, 9, 100])
+def test_clear_bits_turns_off_only_given_positions(n_bits):
+    rng = np.random.default_rng(n_bits)
+    bits = rng.random(n_bits) < 0.7
+    positions = rng.integers(0, n_bits, max(1, n_bits // 3))  # có thể trùng nhau
+    packed = np.packbits(bits)
+    _clear_bits(packed, positions)
+    expected = bits.copy()
+    expected[positions] = False
+    np.testing.assert_array_equal(np.unpackbits(packed, count=n_bits).astype(bool), expected)
+    assert not np.unpackbits(packed)[n_bits:].any()  # bit đệm cuối vẫn là 0
@@ -0,0 +1,126 @@
+# tests/test_ingest.py
+"""Nạp tăng dần vào kho phân vùng: kết quả phải giống nạp lại toàn bộ, và chi phí không
+tăng theo lịch sử (dòng bị thay thế chỉ là tombstone, Dataset tự nén khi nhiều dòng chết)."""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset as ds
+import ingest
+from conftest import DATA_CSV
+
+
+def _fingerprint(dataset):
+    """Kết quả lọc / cube / kỹ năng / lương theo từng vai trò (không phụ thuộc thứ tự dòng)."""
+    result = []
+    for role in dataset.filter_options('job_role_group') + [None]:
+        rows = dataset.filter_index.select(role=role)
+        cells = dataset.cube.select_cells(role=role)
+        skills = dataset.skill_matrix
+        skill_counts = sorted((s, int(c)) for s, c in zip(skills.vocabulary, skills.counts(rows)) if c)
+        salary_sum = float(dataset.rows(rows, ['salary_min_vnd'])['salary_min_vnd'].astype(float).sum())
+        result.append((role, len(rows), dataset.cube.total(cells), skill_counts, round(salary_sum, 1)))
+    return result
+
+
+@pytest.fixture()
+def seed_rows():
+    return pd.read_csv(DATA_CSV)
+
+
+def _rescrape_batch(seed_rows, tmp_path, i, n_rows, rng):
+    batch = seed_rows.iloc[rng.choice(len(seed_rows), n_rows, replace=False)].copy()
+    batch['process_timestamp'] = pd.Timestamp('2030-01-01') + pd.Timedelta(days=i)
+    path = str(tmp_path / f"batch_{i}.csv")
+    batch.to_csv(path, index=False)
+    return path
+
+
+def test_rescrape_batches_match_full_reload_and_stay_bounded(seed_rows, tmp_path):
+    store = str(tmp_path / "store")
+    ingest.ingest_batch(store, DATA_CSV)
+    source = ds.PartitionedStoreSource(store)
+    n_live = len(source.current().df)
+    rng = np.random.default_rng(0)
+    for i in range(30):
+        stats = ingest.ingest_batch(store, _rescrape_batch(seed_rows, tmp_path, i, 15, rng))
+        assert stats['rows_replaced'] == 15
+        incremental = source.current()
+        full = ds.PartitionedStoreSource(store).current()
+        assert len(full.df) == n_live
+        assert _fingerprint(incremental) == _fingerprint(full)
+        # Dòng chết không tích lũy theo lịch sử: Dataset được nén khi vượt ngưỡng
+        assert len(incremental.dead_rows) <= ds.COMPACT_DEAD_FRACTION * len(incremental.df)
+
+
+def test_new_batches_are_appended_as_chunks_without_copying_history(seed_rows, tmp_path):
+    store = str(tmp_path / "store")
+    ingest.ingest_batch(store, DATA_CSV)
+    source = ds.PartitionedStoreSource(store)
+    previous = source.current()
+    rng = np.random.default_rng(1)
+    for i in range(20):
+        path = _rescrape_batch(seed_rows, tmp_path, i, 5, rng)
+        pd.read_csv(path).assign(url=lambda b: b['url'] + f"?batch={i}").to_csv(path, index=False)  # tin mới
+        ingest.ingest_batch(store, path)
+        dataset = source.current()
+        assert dataset._chunks[0] is previous._chunks[0]  # khung ban đầu không bị chép lại
+        assert len(dataset._chunks) <= np.log2(len(dataset) / 5) + 2
+        # Lấy dòng qua các chunk (thứ tự tùy ý) giống lấy từ khung đầy đủ, kể cả category
+        positions = rng.permutation(len(dataset))[:200]
+        pd.testing.assert_frame_equal(dataset.rows(positions), dataset.df.take(positions))
+        previous = dataset
+    assert len(previous) == len(ds.PartitionedStoreSource(store).current())
+
+
+def test_superseded_rows_become_tombstones_without_rewriting_parts(seed_rows, tmp_path):
+    store = str(tmp_path / "store")
+    ingest.ingest_batch(store, DATA_CSV)
+    parts_before = set(ingest.read_store_manifest(store)['parts'])
+    # Mỗi url chọn từ một part lớn khác nhau, nên không part nào vượt ngưỡng nén
+    url_index = ingest.read_url_index(store).reset_index()
+    big_parts = [p for p, n in ingest.read_store_manifest(store)['parts'].items() if n >= 4][:3]
+    urls = url_index[url_index['part'].isin(big_parts)].groupby('part')['url'].first()
+    batch = seed_rows[seed_rows['url'].isin(urls)].assign(process_timestamp='2030-01-01 00:00:00')
+    path = str(tmp_path / "batch.csv")
+    batch.to_csv(path, index=False)
+
+    stats = ingest.ingest_batch(store, path)
+    manifest = ingest.read_store_manifest(store)
+    assert stats['parts_removed'] == []
+    assert parts_before <= set(manifest['parts'])
+    assert sum(len(rows) for rows in ingest.part_tombstones(manifest).values()) == len(urls)
+
+
+def test_small_batch_reads_and_rewrites_only_its_url_buckets(seed_rows, tmp_path, monkeypatch):
+    store = str(tmp_path / "store")
+    ingest.ingest_batch(store, DATA_CSV)
+    path = _rescrape_batch(seed_rows, tmp_path, 0, 5, np.random.default_rng(2))
+    batch_buckets = set(ingest.url_buckets(pd.read_csv(path)['url']))
+    touched = []
+    for name in ('_read_bucket', '_write_bucket'):
+        original = getattr(ingest, name)
+        monkeypatch.setattr(ingest, name, lambda store_dir, bucket, *args, original=original: touched.append(bucket) or original(store_dir, bucket, *args))
+    stats = ingest.ingest_batch(store, path)
+    assert stats['rows_replaced'] == 5 and stats['parts_removed'] == []
+    assert set(touched) == batch_buckets
+
+
+@pytest.mark.parametrize("schema", [1, 2])
+def test_legacy_url_index_is_split_into_buckets(seed_rows, tmp_path, schema):
+    store = str(tmp_path / "store")
+    ingest.ingest_batch(store, DATA_CSV)
+    # Dựng lại kho kiểu cũ: một file _url_index.parquet (schema 1: chưa có cột row)
+    legacy = ingest.read_url_index(store).reset_index()
+    legacy.drop(columns=['row'] if schema == 1 else []).to_parquet(os.path.join(store, ingest.LEGACY_URL_INDEX_FILE_NAME), index=False)
+    shutil.rmtree(os.path.join(store, ingest.URL_INDEX_DIR_NAME))
+
+    stats = ingest.ingest_batch(store, _rescrape_batch(seed_rows, tmp_path, 0, 15, np.random.default_rng(3)))
+    assert stats['rows_replaced'] == 15
+    assert not os.path.exists(os.path.join(store, ingest.LEGACY_URL_INDEX_FILE_NAME))
+    url_index = ingest.read_url_index(store)
+    assert len(url_index) == len(legacy) and url_index.index.is_unique
+    assert _fingerprint(ds.PartitionedStoreSource(store).current()) == _fingerprint(ds.CsvSnapshotSource(DATA_CSV).current())
@@ -0,0 +1,53 @@
+# tests/test_instrumentation.py
+"""Đo bộ nhớ bằng tracemalloc chỉ được bật trong lúc có Trace đo bộ nhớ đang chạy."""
+import threading
+import tracemalloc
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture()
+def memory_config(tmp_path):
+    assert not tracemalloc.is_tracing()
+    return instrumentation.TraceConfig(sample_rate=0, log_path=str(tmp_path / "trace.jsonl"), track_memory=True)
+
+
+def test_tracemalloc_stops_after_forced_trace(memory_config):
+    trace = instrumentation.begin_trace(memory_config, force=True)
+    with instrumentation.span('step') as s:
+        s.set_rows_out(1)
+    assert tracemalloc.is_tracing()
+    assert instrumentation.end_trace(memory_config) is trace
+    assert trace.spans[0].alloc_bytes is not None
+    assert not tracemalloc.is_tracing()
+    # Lần chạy sau không được lấy mẫu: không bật lại tracemalloc
+    assert instrumentation.begin_trace(memory_config) is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracemalloc_stays_on_until_last_trace_ends(memory_config):
+    started, release = threading.Barrier(2), threading.Event()
+
+    def other_session():
+        instrumentation.begin_trace(memory_config, force=True)
+        started.wait()
+        release.wait()
+        instrumentation.end_trace(memory_config)
+
+    thread = threading.Thread(target=other_session)
+    thread.start()
+    instrumentation.begin_trace(memory_config, force=True)
+    started.wait()
+    instrumentation.end_trace(memory_config)
+    assert tracemalloc.is_tracing()  # phiên kia vẫn đang đo
+    release.set()
+    thread.join()
+    assert not tracemalloc.is_tracing()
+
+
+def test_interrupted_trace_releases_tracemalloc(memory_config):
+    instrumentation.begin_trace(memory_config, force=True)  # lần chạy bị ngắt, không gọi end_trace
+    assert instrumentation.begin_trace(memory_config) is None
+    assert not tracemalloc.is_tracing()
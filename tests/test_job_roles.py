@@ -0,0 +1,57 @@
+# tests/test_job_roles.py
+"""JobRoleClassifier phải cho kết quả giống hệt hàm phân loại cũ của end-user.py."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import job_roles
+from conftest import DATA_CSV
+
+
+def categorize_job_role_st(title):
+    """Bản gốc (trước khi chuyển sang job_role_rules.json), giữ nguyên để đối chiếu."""
+    title_lower = str(title).lower()
+    if any(kw in title_lower for kw in ['hr data analyst']): return 'HR Data Analyst'
+    if any(kw in title_lower for kw in ['data analyst', 'phân tích dữ liệu', 'bi analyst', 'business intelligence analyst', 'insight analyst', 'data analytics', 'quantitative researcher']): return 'Data Analyst'
+    if any(kw in title_lower for kw in ['business analyst', 'phân tích kinh doanh', 'phân tích nghiệp vụ', 'it ba', 'technical business analyst', 'system analyst', 'phân tích hệ thống', 'process analyst']): return 'Business Analyst'
+    if any(kw in title_lower for kw in ['product owner']): return 'Product Owner'
+    if any(kw in title_lower for kw in ['product manager']): return 'Product Manager'
+    return 'Khác'
+
+
+EDGE_TITLES = [
+    None, np.nan, "", "   ",
+    "DATA ANALYST", "Senior HR DATA ANALYST", "PHÂN TÍCH DỮ LIỆU", "Chuyên Viên Phân Tích Nghiệp Vụ",
+    # Từ khóa chồng nhau giữa các luật: luật đứng trước phải thắng
+    "hr data analyst", "HR Data Analyst / Business Analyst", "data analyst cum business analyst",
+    "Business Analyst kiêm Data Analyst", "it ba", "IT BA (Technical Business Analyst)",
+    "Product Owner / Product Manager", "Product Manager - Data Analytics", "system analyst, process analyst",
+    "bi analyst", "business intelligence analyst", "Quantitative Researcher", "insight analyst",
+    "Digital Marketing Executive", "unit bar",  # "it ba" nằm giữa hai từ khác
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return job_roles.get_classifier()
+
+
+@pytest.mark.parametrize("title", EDGE_TITLES)
+def test_classify_title_matches_reference_on_edge_cases(classifier, title):
+    assert classifier.classify_title(title) == categorize_job_role_st(title)
+
+
+def test_classify_series_matches_reference_on_edge_cases(classifier):
+    titles = pd.Series(EDGE_TITLES, dtype=object)
+    result = classifier.classify_series(titles)
+    assert result.tolist() == [categorize_job_role_st(t) for t in EDGE_TITLES]
+    assert result.index.equals(titles.index)
+
+
+def test_matches_reference_on_every_dataset_title(classifier):
+    titles = pd.read_csv(DATA_CSV, usecols=['job_title'])['job_title']
+    expected = [categorize_job_role_st(t) for t in titles]
+    assert [classifier.classify_title(t) for t in titles] == expected
+    assert classifier.classify_series(titles).tolist() == expected
+    # Chữ hoa không được làm đổi kết quả
+    assert classifier.classify_series(titles.str.upper()).tolist() == [categorize_job_role_st(t) for t in titles.str.upper()]
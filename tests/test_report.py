@@ -0,0 +1,36 @@
+# tests/test_report.py
+"""Báo cáo tĩnh phải khớp số liệu với dashboard ở bộ lọc mặc định."""
+import json
+import os
+
+import pytest
+
+import analytics
+import report
+from conftest import DATA_CSV
+
+
+def _all_segment(tmp_path, **kwargs):
+    output_dir = str(tmp_path / "reports")
+    # min_postings lớn để chỉ dựng phân khúc "Tất cả" × "Tất cả" × "Tất cả"
+    report.generate_reports(DATA_CSV, str(tmp_path / "store"), output_dir, formats=['json'], workers=1,
+                            include_all=True, min_postings=300, **kwargs)
+    with open(os.path.join(output_dir, "index.json"), encoding='utf-8') as f:
+        index = {row['slug']: row for row in json.load(f)}
+    return index['tat-ca__tat-ca__tat-ca']
+
+
+def test_default_exp_range_matches_dashboard(tmp_path):
+    dataset = analytics.load_dataset(DATA_CSV, str(tmp_path / "store"))
+    dashboard = analytics.Selection(dataset, exp_range=dataset.experience_bounds())
+    assert _all_segment(tmp_path)['postings'] == len(dashboard)
+
+
+def test_exp_range_all_keeps_postings_without_experience(tmp_path):
+    dataset = analytics.load_dataset(DATA_CSV, str(tmp_path / "store"))
+    assert _all_segment(tmp_path, exp_range=None)['postings'] == len(analytics.Selection(dataset))
+
+
+@pytest.mark.parametrize("text, expected", [("dashboard", report.DASHBOARD_EXP_RANGE), ("all", None), ("2-5", (2, 5))])
+def test_parse_exp_range(text, expected):
+    assert report.parse_exp_range(text) == expected
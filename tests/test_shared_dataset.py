@@ -0,0 +1,141 @@
+# tests/test_shared_dataset.py
+"""Dataset dùng chung cho mọi phiên phải chỉ đọc: không phiên nào sửa được dữ liệu của phiên khác.
+
+freeze_frame dựa vào df._mgr.blocks (API nội bộ của pandas); các test dưới đây là chốt chặn
+khi nâng cấp pandas.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import dataset as ds
+import ingest
+from conftest import DATA_CSV
+
+N_THREADS = 8
+
+
+@pytest.fixture(scope="module", params=["csv", "store"])
+def shared(request, tmp_path_factory):
+    """Dataset từ snapshot CSV (cột numpy) và từ kho phân vùng (cột Int64 / categorical)."""
+    if request.param == "csv":
+        return ds.CsvSnapshotSource(DATA_CSV).current()
+    store = str(tmp_path_factory.mktemp("store"))
+    ingest.ingest_batch(store, DATA_CSV)
+    return ds.PartitionedStoreSource(store).current()
+
+
+def _assert_read_only(write):
+    """write() phải thất bại vì mảng chỉ đọc. Với cột datetime/period, pandas bọc lỗi
+    ValueError read-only trong một AssertionError nội bộ, nên tìm trong chuỗi ngoại lệ."""
+    with pytest.raises(Exception) as info:
+        write()
+    error = info.value
+    while error is not None and not (isinstance(error, ValueError) and "read-only" in str(error)):
+        error = error.__cause__ or error.__context__
+    assert error is not None, f"lỗi không phải do dữ liệu chỉ đọc: {info.value!r}"
+
+
+# --- Ghi tại chỗ phải báo lỗi ---
+def test_iloc_write_raises_for_every_column(shared):
+    df = shared.df
+    before = shared.df.head(2).astype(str)
+    for j, column in enumerate(df.columns):
+        if column in ('parsed_skills_or_tags', 'parsed_benefits'):
+            continue  # ô list: xem test riêng bên dưới
+        value = df.iloc[1, j]
+        _assert_read_only(lambda: df.iloc.__setitem__((0, j), value))
+    pd.testing.assert_frame_equal(shared.df.head(2).astype(str), before)
+
+
+def test_loc_write_raises(shared):
+    df = shared.df
+    _assert_read_only(lambda: df.loc.__setitem__((df.index[0], 'salary_avg_vnd'), 1.0))
+    _assert_read_only(lambda: df.loc.__setitem__((df.index[0], 'salary_min_vnd'), df['salary_min_vnd'].iloc[1]))
+    _assert_read_only(lambda: df.loc.__setitem__((df.index[0], 'source_website'), df['source_website'].iloc[1]))
+
+
+def test_list_cells_are_read_only(shared):
+    cell = next(skills for skills in shared.df['parsed_skills_or_tags'] if isinstance(skills, np.ndarray) and len(skills))
+    _assert_read_only(lambda: cell.__setitem__(0, 'changed'))
+
+
+def test_list_cells_of_appended_batch_are_read_only(tmp_path):
+    # Ô list chỉ được khóa một lần khi part được đọc: batch nạp tăng dần cũng phải được khóa
+    df_raw = pd.read_csv(DATA_CSV)
+    store = str(tmp_path / "store")
+    df_raw.iloc[:200].to_csv(tmp_path / "first.csv", index=False)
+    df_raw.iloc[200:].to_csv(tmp_path / "second.csv", index=False)
+    ingest.ingest_batch(store, str(tmp_path / "first.csv"))
+    source = ds.PartitionedStoreSource(store)
+    source.current()
+    ingest.ingest_batch(store, str(tmp_path / "second.csv"))
+    appended = source.current()
+    skills = appended.rows(np.arange(200, len(appended.df)), ['parsed_skills_or_tags'])['parsed_skills_or_tags']
+    cell = next(s for s in skills if isinstance(s, np.ndarray) and len(s))
+    _assert_read_only(lambda: cell.__setitem__(0, 'changed'))
+
+
+def test_derived_structures_are_read_only(shared):
+    for bitmaps in shared.filter_index.bitmaps.values():
+        for bitmap in bitmaps.values():
+            _assert_read_only(lambda: bitmap.__setitem__(0, 0))
+    _assert_read_only(lambda: shared.skill_matrix.matrix.data.__setitem__(0, 99))
+    _assert_read_only(lambda: shared.cube.count.__setitem__(0, 99))
+
+
+def test_selection_rows_are_read_only(shared):
+    rows = analytics.Selection(shared).rows
+    _assert_read_only(lambda: rows.__setitem__(0, 1))
+
+
+# --- Cột thêm trong một phiên không lộ sang phiên khác ---
+def test_new_column_stays_in_its_session(shared):
+    first, second = shared.df, shared.df
+    first['session_column'] = 1
+    first['salary_avg_vnd'] = 0.0
+    assert 'session_column' not in second.columns
+    assert 'session_column' not in shared.df.columns
+    assert not (second['salary_avg_vnd'].fillna(-1) == 0.0).all()
+    # Bản nông: dùng chung bộ nhớ với dữ liệu gốc, không sao chép
+    assert np.shares_memory(second['salary_avg_vnd'].to_numpy(), shared.df['salary_avg_vnd'].to_numpy())
+
+
+# --- Truy vấn song song ---
+def _query(dataset, filters):
+    selection = analytics.Selection(dataset, *filters, exp_range=dataset.experience_bounds())
+    salary = dataset.rows(selection.rows, ['salary_avg_vnd'])['salary_avg_vnd']
+    return (len(selection), dataset.cube.total(selection.cells),
+            tuple(dataset.skill_matrix.top_skills(selection.rows, 5).items()),
+            round(float(salary.sum()), 2), tuple(selection.rows[:5]))
+
+
+def test_concurrent_queries_match_serial_results(shared):
+    filters = [(source, location, role)
+               for source in shared.filter_options('source_website') + [None]
+               for location in shared.filter_options('location_primary')[:4] + [None]
+               for role in shared.filter_options('job_role_group') + [None]]
+    expected = {f: _query(shared, f) for f in filters}
+    mismatches, errors = [], []
+    barrier = threading.Barrier(N_THREADS)
+
+    def worker(offset):
+        try:
+            barrier.wait()
+            for _ in range(5):
+                for f in filters[offset::2] + filters[::-1]:
+                    if _query(shared, f) != expected[f]:
+                        mismatches.append(f)
+        except Exception as e:  # noqa: BLE001 - báo lại ở luồng chính
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i % 2,)) for i in range(N_THREADS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert errors == []
+    assert mismatches == []
+    # Sau khi chạy song song, dữ liệu dùng chung không đổi
+    assert {f: _query(shared, f) for f in filters} == expected